@@ -0,0 +1,185 @@
+from __future__ import annotations #for python3.8 or less
+
+import asyncio, time
+
+from collections.abc import Callable
+from typing import Optional
+
+def linear(t: float) -> float:
+    """Constant speed from start to end."""
+
+    return t
+
+def easeIn(t: float) -> float:
+    """Starts slow and accelerates toward the end."""
+
+    return t * t
+
+def easeOut(t: float) -> float:
+    """Starts fast and decelerates toward the end."""
+
+    return t * (2 - t)
+
+def easeInOut(t: float) -> float:
+    """Accelerates through the first half and decelerates through the second."""
+
+    if t < 0.5:
+        return 2 * t * t
+    return -1 + (4 - 2 * t) * t
+
+EASINGS: dict[str, Callable[[float], float]] = {
+    "linear": linear,
+    "easeIn": easeIn,
+    "easeOut": easeOut,
+    "easeInOut": easeInOut,
+    }
+
+class Ramp:
+    """Interpolation of a single property from a start value toward a target value."""
+
+    def __init__(self, data: dict, start: float, target: float, duration: float, easing: str, now: float) -> None:
+        """Initializes a ramp beginning at now, with the duration in seconds."""
+
+        self.data: dict = data
+        self.start: float = start
+        self.target: float = target
+        self.duration: float = duration
+        self.easing: Callable[[float], float] = EASINGS[easing]
+        self.began: float = now
+        self.value: float = start
+        self.done: bool = False
+
+    def retarget(self, data: dict, target: float, duration: float, easing: str, now: float) -> None:
+        """Redirects the ramp toward a new target, continuing from its current value."""
+
+        self.data = data
+        self.start = self.value
+        self.target = target
+        self.duration = duration
+        self.easing = EASINGS[easing]
+        self.began = now
+        self.done = False
+
+    def step(self, now: float) -> float:
+        """Advances the ramp to now and returns the interpolated value."""
+
+        if self.duration <= 0:
+            progress: float = 1.0
+        else:
+            progress = min((now - self.began) / self.duration, 1.0)
+        self.value = self.start + (self.target - self.start) * self.easing(progress)
+        self.done = progress >= 1.0
+        return self.value
+
+class Animator:
+    """Fixed-rate frame scheduler that interpolates properties and coalesces their updates."""
+
+    def __init__(self, rate: float = 60.0) -> None:
+        """Initializes the animator to produce rate frames per second."""
+
+        self.rate: float = rate
+        self.period: float = 1 / rate
+        self.deadline: float = 0.0
+
+        self.ramps: dict[tuple, Ramp] = {}
+        self.frame: dict[tuple, dict] = {}
+
+        self.frames: int = 0
+        self.skipped: int = 0
+
+    def animate(self, key: tuple, data: dict, start: float, target: float, duration: float, easing: str, now: float) -> None:
+        """Starts a ramp for the property identified by key, or retargets the one already running."""
+
+        ramp = self.ramps.get(key)
+        if ramp != None:
+            ramp.retarget(data, target, duration, easing, now) #type: ignore
+        else:
+            self.ramps[key] = Ramp(data, start, target, duration, easing, now)
+
+    def current(self, key: tuple) -> Optional[float]:
+        """Returns the latest value of the ramp for key, if one is running."""
+
+        ramp = self.ramps.get(key)
+        if ramp != None:
+            return ramp.value #type: ignore
+        return None
+
+    def post(self, key: tuple, data: dict) -> None:
+        """Queues a request for the next frame, replacing any earlier one for the same key."""
+
+        self.frame[key] = data
+
+    def stop(self, key: tuple) -> None:
+        """Stops the ramp for key where it is, if one is running."""
+
+        self.ramps.pop(key, None)
+
+    def discard(self, key: tuple) -> None:
+        """Drops the request queued for the next frame under key, if any."""
+
+        self.frame.pop(key, None)
+
+    def accumulate(self, key: tuple, data: dict, field: str, delta: float) -> None:
+        """Queues a relative change of field for the next frame, adding it to any earlier one for the same key.
+
+        The request names the field in accumulate, so the queue keeps adding it up if the request has to wait."""
+
+        queued: Optional[dict] = self.frame.get(key)
+        if queued != None:
+            queued[field] += delta #type: ignore
+        else:
+            data[field] = delta
+            data["accumulate"] = field
+            self.frame[key] = data
+
+    def merge(self, key: tuple, data: dict, field: str, values: dict) -> None:
+        """Queues a partial update for the next frame, merging its values into any earlier one for the same key.
+
+        The request names the field in merge, so the queue keeps merging it if the request has to wait."""
+
+        queued: Optional[dict] = self.frame.get(key)
+        if queued != None:
+            queued[field].update(values) #type: ignore
+        else:
+            data[field] = values
+            data["merge"] = field
+            self.frame[key] = data
+
+    def tick(self, now: float) -> list[tuple[tuple, dict]]: #type: ignore
+        """Advances every ramp to now and returns at most one request per property, with its key."""
+
+        if self.ramps:
+            finished: list = []
+            for key, ramp in self.ramps.items():
+                data = ramp.data.copy()
+                data["value"] = ramp.step(now)
+                self.frame[key] = data
+                if ramp.done:
+                    finished.append(key)
+            for key in finished:
+                del self.ramps[key]
+
+        if not self.frame:
+            return []
+
+        frame: list[tuple[tuple, dict]] = list(self.frame.items()) #type: ignore
+        self.frame.clear()
+        return frame
+
+    async def wait(self) -> float:
+        """Sleeps until the next frame deadline and returns the current time.
+
+        Deadlines are fixed multiples of the period, so slow frames do not drift the rate;
+        frames that were missed entirely are skipped rather than run back to back."""
+
+        now: float = time.perf_counter()
+        if self.deadline == 0.0:
+            self.deadline = now
+        self.deadline += self.period
+        if self.deadline < now:
+            missed: int = int((now - self.deadline) / self.period) + 1
+            self.skipped += missed
+            self.deadline += missed * self.period
+        await asyncio.sleep(self.deadline - now)
+        self.frames += 1
+        return time.perf_counter()
@@ -0,0 +1,85 @@
+from __future__ import annotations #for python3.8 or less
+
+import math
+
+from collections.abc import Callable
+
+#Range of the log taper, as in the OBS mixer
+LOG_OFFSET_DB: float = 6.0
+LOG_RANGE_DB: float = 96.0
+
+def dbToMul(db: float) -> float:
+    """Converts decibels to a volume multiplier."""
+
+    if db == -math.inf:
+        return 0.0
+    return 10 ** (db / 20)
+
+def mulToDb(mul: float) -> float:
+    """Converts a volume multiplier to decibels."""
+
+    if mul <= 0:
+        return -math.inf
+    return 20 * math.log10(mul)
+
+def linear(position: float) -> float:
+    """Multiplier proportional to the fader position."""
+
+    return position
+
+def cubic(position: float) -> float:
+    """Multiplier of the cube of the fader position, the default taper of the OBS mixer."""
+
+    return position ** 3
+
+def iec(position: float) -> float:
+    """Multiplier of the IEC 60268-18 meter scale, in piecewise linear decibel segments."""
+
+    if position >= 1.0:
+        return 1.0
+    if position >= 0.75:
+        db: float = (position - 1.0) / 0.25 * 9.0
+    elif position >= 0.5:
+        db = (position - 0.75) / 0.25 * 11.0 - 9.0
+    elif position >= 0.3:
+        db = (position - 0.5) / 0.2 * 10.0 - 20.0
+    elif position >= 0.15:
+        db = (position - 0.3) / 0.15 * 10.0 - 30.0
+    elif position >= 0.075:
+        db = (position - 0.15) / 0.075 * 10.0 - 40.0
+    elif position >= 0.025:
+        db = (position - 0.075) / 0.05 * 10.0 - 50.0
+    elif position >= 0.001:
+        db = (position - 0.025) / 0.025 * 90.0 - 60.0
+    else:
+        return 0.0
+    return dbToMul(db)
+
+def log(position: float) -> float:
+    """Multiplier of a logarithmic fader spanning 96 dB."""
+
+    if position <= 0:
+        return 0.0
+    if position >= 1.0:
+        return 1.0
+    db: float = -(LOG_RANGE_DB + LOG_OFFSET_DB) * ((LOG_RANGE_DB + LOG_OFFSET_DB) / LOG_OFFSET_DB) ** -position + LOG_OFFSET_DB
+    return dbToMul(db)
+
+TAPERS: dict[str, Callable[[float], float]] = {
+    "linear": linear,
+    "cubic": cubic,
+    "iec": iec,
+    "log": log,
+    }
+
+tables: dict[tuple[str, int], list[float]] = {} #type: ignore
+
+def taper(name: str, maximum: int) -> list[float]: #type: ignore
+    """Returns the multiplier of every fader value up to maximum, computed once per taper and resolution."""
+
+    table = tables.get((name, maximum))
+    if table == None:
+        curve: Callable[[float], float] = TAPERS[name]
+        table = [curve(value / maximum) for value in range(maximum + 1)]
+        tables[(name, maximum)] = table
+    return table #type: ignore
@@ -0,0 +1,87 @@
+from __future__ import annotations #for python3.8 or less
+
+import asyncio, itertools, random, statistics, sys, time, argparse, os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from animation import Animator, EASINGS
+from messages import Request
+from structures import OBS
+
+def percentile(values: list[float], fraction: float) -> float: #type: ignore
+    """Returns the value at fraction of the sorted values."""
+
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+async def benchmark(ramps: int, rate: float, seconds: float, intake: int) -> None:
+    """Runs ramps concurrent ramps at rate Hz while feeding intake simulated MIDI events per frame."""
+
+    animator: Animator = Animator(rate)
+    obs: OBS = OBS()
+    obs.updateScenes([{"name": "scene", "sources": [
+        {"name": f"source{i}", "render": True} for i in range(ramps)]}], "scene")
+    obs.requests.clear()
+    for source in obs.currentScene.sources: #type: ignore
+        source.addFilter({"name": "filter", "type": "color_filter", "enabled": True, "settings": {"opacity": 100}})
+    _id = (str(i) for i in itertools.count())
+    easings: list[str] = list(EASINGS)
+    keys: list[tuple] = [("filter", f"source{i}", "filter", "opacity") for i in range(ramps)]
+
+    intervals: list[float] = []
+    costs: list[float] = []
+    sent: int = 0
+    duplicates: int = 0
+    events: int = 0
+
+    last: float = time.perf_counter()
+    end: float = last + seconds
+    while True:
+        now = await animator.wait()
+        if now >= end:
+            break
+        intervals.append(now - last)
+        last = now
+
+        began: float = time.perf_counter()
+
+        #Simulated MIDI intake: knob moves retarget a random subset of the ramps
+        for _ in range(intake):
+            i = random.randrange(ramps)
+            start = animator.current(keys[i])
+            animator.animate(keys[i], {
+                "type": "setFilterSetting",
+                "targetSource": keys[i][1],
+                "targetFilter": "filter",
+                "targetSetting": "opacity"},
+                0.0 if start == None else start, random.uniform(0, 100), random.uniform(0.2, 2.0), random.choice(easings), now)
+            events += 1
+
+        seen: set = set()
+        for key, data in animator.tick(now):
+            property = (data["targetSource"], data["targetSetting"])
+            if property in seen:
+                duplicates += 1
+            seen.add(property)
+            sent += len(Request(_id, data, obs).format())
+
+        costs.append(time.perf_counter() - began)
+
+    frames: int = len(intervals)
+    print(f"ramps={ramps} rate={rate}Hz intake={intake}/frame duration={seconds}s")
+    print(f"  frames: {frames} ({frames / seconds:.1f}/s), skipped {animator.skipped}")
+    print(f"  frame interval ms: p50 {percentile(intervals, 0.5) * 1000:.2f} p99 {percentile(intervals, 0.99) * 1000:.2f} max {max(intervals) * 1000:.2f}")
+    print(f"  frame work ms: mean {statistics.mean(costs) * 1000:.3f} p99 {percentile(costs, 0.99) * 1000:.3f} max {max(costs) * 1000:.3f}")
+    print(f"  messages: {sent} ({sent / max(frames, 1):.1f}/frame), duplicate properties in a frame: {duplicates}")
+    print(f"  MIDI events handled: {events}")
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument("--ramps", type = int, default = 100)
+    parser.add_argument("--rate", type = float, default = 60.0)
+    parser.add_argument("--seconds", type = float, default = 5.0)
+    parser.add_argument("--intake", type = int, default = 10)
+
+    args: argparse.Namespace = parser.parse_args()
+
+    asyncio.run(benchmark(args.ramps, args.rate, args.seconds, args.intake))
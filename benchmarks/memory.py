@@ -0,0 +1,113 @@
+from __future__ import annotations #for python3.8 or less
+
+import sys, argparse, os, json, gc, time, tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from structures import OBS
+
+class DictSource:
+    """Source layout before slots: a per-instance dict that keeps the whole scene item."""
+
+    def __init__(self, data: dict) -> None:
+        """Initializes a source."""
+
+        self.name: str = data["name"]
+        self.data: dict = data
+        self.filters: list = []
+        self.confirmed: bool = data["render"]
+        self.inflight: int = 0
+
+    def isVisible(self) -> bool:
+        """Returns if the source is visible."""
+
+        return self.data["render"]
+
+    def setVisible(self, visible: bool) -> None:
+        """Sets source visibility."""
+
+        self.data["render"] = visible
+
+class DictFilter:
+    """Filter layout before slots."""
+
+    def __init__(self, data: dict) -> None:
+        """Initializes a filter."""
+
+        self.name: str = data["name"]
+        self.settings: dict = data["settings"]
+        self.type: str = data["type"]
+        self.enabled: bool = data["enabled"]
+        self.confirmed: bool = self.enabled
+        self.inflight: int = 0
+
+def payload(scenes: int, items: int, filters: int) -> str:
+    """Returns GetSceneList and GetSourceFilters replies for a synthetic collection, as OBS would send them."""
+
+    sceneList: list = []
+    filterLists: list = []
+    for s in range(scenes):
+        sources: list = []
+        for i in range(items):
+            #The same inputs appear in many scenes, as in real collections
+            name: str = f"Camera {i}"
+            sources.append({"alignment": 5, "cx": 1920.0, "cy": 1080.0, "id": i, "locked": False,
+                            "muted": False, "name": name, "render": True, "source_cx": 1920,
+                            "source_cy": 1080, "type": "dshow_input", "volume": 1.0, "x": 0.0, "y": 0.0})
+            filterLists.append([{"enabled": True, "name": f"Color {f}", "type": "color_filter",
+                                 "settings": {"hue_shift": 0.0, "opacity": 100}} for f in range(filters)])
+        sceneList.append({"name": f"Scene {s}", "sources": sources})
+    return json.dumps({"current-scene": "Scene 0", "scenes": sceneList, "filters": filterLists})
+
+def build(text: str, compact: bool) -> OBS:
+    """Loads the collection into an OBS container, with the current or the earlier source layout."""
+
+    data: dict = json.loads(text)
+    obs: OBS = OBS()
+    obs.updateScenes(data["scenes"], data["current-scene"])
+    obs.requests.clear()
+    filters = iter(data["filters"])
+    for scene in obs.scenes:
+        if not compact:
+            scene.sources = [DictSource(item) for item in data["scenes"][obs.scenes.index(scene)]["sources"]] #type: ignore
+            scene.index = {source.name: source for source in scene.sources} #type: ignore
+        for source in scene.sources:
+            if compact:
+                source.setFilters(next(filters))
+            else:
+                source.filters = [DictFilter(item) for item in next(filters)] #type: ignore
+    return obs
+
+def measure(text: str, compact: bool) -> tuple[int, float]: #type: ignore
+    """Returns the bytes retained by the loaded collection and the time of a visibility toggle pass in ms."""
+
+    gc.collect()
+    tracemalloc.start()
+    obs: OBS = build(text, compact)
+    gc.collect()
+    retained: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    sources: list = [source for scene in obs.scenes for source in scene.sources]
+    start: float = time.perf_counter()
+    for _ in range(10):
+        for source in sources:
+            source.setVisible(not source.isVisible())
+    elapsed: float = (time.perf_counter() - start) * 100
+    return retained, elapsed
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument("--scenes", type = int, default = 100)
+    parser.add_argument("--items", type = int, default = 100)
+    parser.add_argument("--filters", type = int, default = 2)
+    args: argparse.Namespace = parser.parse_args()
+
+    text: str = payload(args.scenes, args.items, args.filters)
+    print(f"{args.scenes * args.items} items, {args.filters} filters each")
+    results: dict = {}
+    for label, compact in (("dict", False), ("slots", True)):
+        retained, elapsed = measure(text, compact)
+        results[label] = retained
+        print(f"  {label:>5}: {retained / 1024 ** 2:7.2f} MiB retained  toggle pass {elapsed:6.2f} ms")
+    print(f"  saved {(1 - results['slots'] / results['dict']) * 100:.0f}%")
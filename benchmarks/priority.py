@@ -0,0 +1,70 @@
+from __future__ import annotations #for python3.8 or less
+
+import sys, argparse, os, statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from messages import Request
+from queues import RequestQueue, PRIORITIES
+from structures import OBS
+
+def simulate(prioritize: bool, faders: int, sweep: int, throughput: int, seconds: float) -> tuple[dict, int]: #type: ignore
+    """Sweeps faders while hitting a scene pad every 250 ms and polling a status every 100 ms,
+    with OBS answering throughput requests per second.
+
+    Returns the queueing latencies in milliseconds by request type and the fader updates sent."""
+
+    obs: OBS = OBS()
+    queue: RequestQueue = RequestQueue(1 << 16)
+    queue.connect()
+    latencies: dict = {"transitionToScene": [], "GetStats": []}
+    sent: int = 0
+    arrivals: float = 0.0
+    budget: float = 0.0
+
+    def push(data: dict) -> None:
+        """Queues request data, in a single class when not prioritizing."""
+
+        request: Request = Request(None, data, obs) #type: ignore
+        if not prioritize:
+            request.priority = PRIORITIES["settings"]
+        queue.push(request)
+
+    #Milliseconds of simulated time
+    for tick in range(int(seconds * 1000)):
+        arrivals += sweep * faders / 1000
+        while arrivals >= 1:
+            arrivals -= 1
+            push({"type": "editFilter", "tick": tick})
+        if tick % 250 == 0:
+            push({"type": "transitionToScene", "tick": tick})
+        if tick % 100 == 50:
+            push({"type": "GetStats", "tick": tick})
+
+        budget += throughput / 1000
+        while budget >= 1 and len(queue) > 0:
+            budget -= 1
+            request = queue.pop() #type: ignore
+            if request.data["type"] in latencies:
+                latencies[request.data["type"]].append(tick - request.data["tick"])
+            else:
+                sent += 1
+
+    return latencies, sent
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument("--faders", type = int, default = 8)
+    parser.add_argument("--sweep", type = int, default = 250, help = "updates per second per fader")
+    parser.add_argument("--throughput", type = int, default = 1500, help = "requests per second OBS answers")
+    parser.add_argument("--seconds", type = float, default = 10.0)
+
+    args: argparse.Namespace = parser.parse_args()
+
+    print(f"{args.faders} faders at {args.sweep}/s each, OBS answering {args.throughput}/s, {args.seconds}s simulated")
+    for label, prioritize in (("FIFO", False), ("priority", True)):
+        latencies, sent = simulate(prioritize, args.faders, args.sweep, args.throughput, args.seconds)
+        print(f"  {label}: fader updates sent {sent}")
+        for mtype, values in latencies.items():
+            if values:
+                print(f"    {mtype:>17}: {len(values):3} served, latency ms median {statistics.median(values):6.0f} max {max(values):6.0f}")
@@ -0,0 +1,87 @@
+from __future__ import annotations #for python3.8 or less
+
+import asyncio, itertools, statistics, sys, time, argparse, os, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from messages import Request, Response
+from profiling import Profiler
+from structures import OBS
+
+def setup(sources: int) -> OBS:
+    """Returns an OBS container with a single scene of sources."""
+
+    obs: OBS = OBS()
+    obs.updateScenes([{"name": "scene", "sources": [
+        {"name": f"source{i}", "render": True} for i in range(sources)]}], "scene")
+    return obs
+
+async def workload(obs: OBS, seconds: float) -> int:
+    """Toggles sources and handles the replies and events for seconds, returning the number of toggles."""
+
+    _id = (str(i) for i in itertools.count())
+    sources: int = len(obs.currentScene.sources) #type: ignore
+    count: int = 0
+    end: float = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        for _ in range(100):
+            name: str = f"source{count % sources}"
+            for msg in Request(_id, {"type": "toggleSource", "target": name}, obs).format():
+                obs.pendingResponses[msg["message-id"]] = msg
+                Response({"update-type": "SceneItemVisibilityChanged", "scene-name": "scene",
+                          "item-name": name, "item-visible": msg["render"]}, obs).handle()
+                Response({"message-id": msg["message-id"], "status": "ok"}, obs).handle()
+            count += 1
+        await asyncio.sleep(0)
+    return count
+
+MODES: tuple = (("off", "", 0.0),
+                ("sample 5ms", "sample", 0.005),
+                ("sample 1ms", "sample", 0.001),
+                ("cprofile", "cprofile", 0.0))
+
+async def run(directory: str, mode: str, interval: float, seconds: float, sources: int) -> float:
+    """Returns the toggles per second of the workload under a profiling mode, or without profiling if mode is empty."""
+
+    profiler: Profiler = Profiler(directory, interval)
+    if mode != "":
+        profiler.start(mode)
+    count: int = await workload(setup(sources), seconds)
+    profiler.stop()
+    return count / seconds
+
+async def benchmark(seconds: float, sources: int, rounds: int) -> None:
+    """Compares workload throughput without profiling and with each profiling mode.
+
+    After a warm-up run, every round runs each mode once in a rotated order, so drift such as
+    frequency scaling is spread over the modes; overheads are taken against the unprofiled run of
+    the same round and the median over rounds is reported."""
+
+    directory: str = tempfile.mkdtemp()
+    await run(directory, "", 0.0, seconds, sources)
+
+    rates: dict[str, list[float]] = {label: [] for label, _, _ in MODES} #type: ignore
+    overheads: dict[str, list[float]] = {label: [] for label, _, _ in MODES} #type: ignore
+    for index in range(rounds):
+        results: dict[str, float] = {} #type: ignore
+        for label, mode, interval in MODES[index % len(MODES):] + MODES[:index % len(MODES)]:
+            results[label] = await run(directory, mode, interval, seconds, sources)
+        for label in results:
+            rates[label].append(results[label])
+            overheads[label].append((results["off"] / results[label] - 1) * 100)
+
+    for label, _, _ in MODES:
+        print(f"  {label:>11}: {statistics.median(rates[label]):10.0f} toggles/s  "
+              f"overhead median {statistics.median(overheads[label]):6.1f}%  "
+              f"range {min(overheads[label]):6.1f}% to {max(overheads[label]):6.1f}%")
+
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type = float, default = 3.0)
+    parser.add_argument("--sources", type = int, default = 50)
+    parser.add_argument("--rounds", type = int, default = 5)
+
+    args: argparse.Namespace = parser.parse_args()
+
+    print(f"Profiling overhead, {args.sources} sources, {args.seconds}s per mode, median of {args.rounds} rounds")
+    asyncio.run(benchmark(args.seconds, args.sources, args.rounds))
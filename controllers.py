@@ -0,0 +1,122 @@
+from __future__ import annotations #for python3.8 or less
+
+from collections.abc import Iterable
+
+#Controller numbers from the MIDI 1.0 specification
+DATA_ENTRY_MSB: int = 6
+DATA_ENTRY_LSB: int = 38
+DATA_INCREMENT: int = 96
+DATA_DECREMENT: int = 97
+NRPN_LSB: int = 98
+NRPN_MSB: int = 99
+RPN_LSB: int = 100
+RPN_MSB: int = 101
+
+NULL_PARAMETER: int = 0x3FFF
+MAXIMUM: int = 0x3FFF
+
+#Signed steps of relative encoders for every 7-bit value, by encoding
+RELATIVE: dict[str, list[int]] = { #type: ignore
+    "twos": [value - 128 if value & 0x40 else value for value in range(128)],
+    "sign": [-(value & 0x3F) if value & 0x40 else value for value in range(128)],
+    "offset": [value - 64 for value in range(128)],
+    }
+
+def relative(value: int, encoding: str) -> int:
+    """Decodes the signed step of a relative encoder from a 7-bit control value.
+
+    Encoders send two's complement (127 is -1), sign and magnitude (65 is -1) or an offset of 64 (63 is -1)."""
+
+    return RELATIVE[encoding][value]
+
+class ChannelState:
+    """Assembly state of the multi-message controller values on a single MIDI channel."""
+
+    def __init__(self) -> None:
+        """Initializes the channel with no parameter selected."""
+
+        self.msb: bytearray = bytearray(32)
+        self.registered: bool = False
+        self.parameter: int = NULL_PARAMETER
+        self.data: int = 0
+
+    def select(self, registered: bool, parameter: int) -> None:
+        """Selects the (non-)registered parameter that data entry applies to."""
+
+        if registered != self.registered or parameter != self.parameter:
+            self.registered = registered
+            self.parameter = parameter
+            self.data = 0
+
+class HighResolutionDecoder:
+    """State machine assembling 14-bit control changes and (N)RPN data entry from 7-bit control changes.
+
+    The most recent result is kept in trigger, number and value instead of being returned,
+    so that feeding a message never allocates."""
+
+    def __init__(self, pairs: Iterable[int], parameters: bool) -> None:
+        """Initializes the decoder for the paired MSB controller numbers, and (N)RPN if parameters is set."""
+
+        self.pairs: bytearray = bytearray(32)
+        for control in pairs:
+            if 0 <= control < 32:
+                self.pairs[control] = 1
+        self.parameters: bool = parameters
+
+        self.channels: list[ChannelState] = [ChannelState() for _ in range(16)] #type: ignore
+
+        self.trigger: str = ""
+        self.number: int = 0
+        self.value: int = 0
+
+    def feed(self, channel: int, control: int, value: int) -> bool:
+        """Feeds a control change into the decoder and returns if it completed a high resolution value."""
+
+        state: ChannelState = self.channels[channel]
+
+        if control < 32:
+            if self.pairs[control]:
+                #A lone MSB implies an LSB of zero
+                state.msb[control] = value
+                self.trigger = "control_change_14"
+                self.number = control
+                self.value = value << 7
+                return True
+
+        elif control < 64:
+            if self.pairs[control - 32]:
+                self.trigger = "control_change_14"
+                self.number = control - 32
+                self.value = (state.msb[control - 32] << 7) | value
+                return True
+
+        if not self.parameters:
+            return False
+
+        if control == NRPN_MSB:
+            state.select(False, (value << 7) | (state.parameter & 0x7F))
+        elif control == NRPN_LSB:
+            state.select(False, (state.parameter & 0x3F80) | value)
+        elif control == RPN_MSB:
+            state.select(True, (value << 7) | (state.parameter & 0x7F))
+        elif control == RPN_LSB:
+            state.select(True, (state.parameter & 0x3F80) | value)
+
+        elif state.parameter != NULL_PARAMETER:
+            if control == DATA_ENTRY_MSB:
+                state.data = value << 7
+            elif control == DATA_ENTRY_LSB:
+                state.data = (state.data & 0x3F80) | value
+            elif control == DATA_INCREMENT:
+                state.data = min(state.data + 1, MAXIMUM)
+            elif control == DATA_DECREMENT:
+                state.data = max(state.data - 1, 0)
+            else:
+                return False
+
+            self.trigger = "rpn" if state.registered else "nrpn"
+            self.number = state.parameter
+            self.value = state.data
+            return True
+
+        return False
@@ -0,0 +1,156 @@
+from __future__ import annotations #for python3.8 or less
+
+from collections.abc import Callable
+from typing import Optional
+
+from scheduler import Scheduler, Timer
+
+GESTURES: tuple = ("press", "release", "hold", "tap")
+
+class Gesture:
+    """Timing layer of a single pad, debouncing its edges and recognizing holds and multi-taps.
+
+    Every time comes from the timestamps of the edges and the shared scheduler, so no task sleeps per pad.
+    Presses and releases fire as soon as the edge is accepted; only holds and taps wait for their thresholds."""
+
+    def __init__(self, note: int) -> None:
+        """Initializes the pad for note without commands."""
+
+        self.note: int = note
+        self.commands: dict[str, list[dict]] = {gesture: [] for gesture in GESTURES} #type: ignore
+        self.debounce: float = 0.0
+        self.holds: list[float] = []
+        self.window: float = 0.0
+        self.taps: int = 0
+
+        self.dispatch: Optional[Callable] = None
+        self.scheduler: Optional[Scheduler] = None
+
+        #Last level reported and accepted, and the end of the debounce lockout of the accepted edge
+        self.raw: bool = False
+        self.pressed: bool = False
+        self.locked: float = 0.0
+        self.settle: Optional[Timer] = None
+
+        self.velocity: int = 0
+        self.held: int = 0
+        self.count: int = 0
+        self.timer: Optional[Timer] = None
+
+    def __repr__(self) -> str:
+        """Returns the note and the commands of each gesture."""
+
+        return f"Gesture({self.note}, {dict((gesture, len(commands)) for gesture, commands in self.commands.items())})"
+
+    def add(self, command: dict) -> None:
+        """Adds a command, widening the debounce, hold thresholds and tap window to what it needs."""
+
+        gesture: str = command.get("gesture", "press")
+        if gesture not in GESTURES:
+            raise RuntimeError(f"Unknown gesture {gesture}.")
+
+        self.commands[gesture].append(command)
+        self.debounce = max(self.debounce, command.get("debounce", 0) / 1000)
+        if gesture == "hold":
+            hold: float = command.get("hold", 500) / 1000
+            if hold not in self.holds:
+                self.holds.append(hold)
+                self.holds.sort()
+        elif gesture == "tap":
+            self.window = max(self.window, command.get("window", 300) / 1000)
+            self.taps = max(self.taps, command.get("taps", 1))
+
+    def bind(self, dispatch: Callable, scheduler: Scheduler) -> None:
+        """Sets where commands are dispatched and the scheduler running the thresholds."""
+
+        self.dispatch = dispatch
+        self.scheduler = scheduler
+
+    def edge(self, pressed: bool, velocity: int, now: float) -> None:
+        """Feeds a press or release of the pad at now.
+
+        The first edge is accepted at once and locks out bounces for the debounce time;
+        if the pad settled on the other level by then, that level is accepted when the lockout ends."""
+
+        self.raw = pressed
+        if pressed:
+            self.velocity = velocity
+        if now < self.locked:
+            if self.settle == None:
+                self.settle = self.scheduler.callAt(self.locked, self.settled) #type: ignore
+            return
+        self.accept(pressed, now)
+
+    def settled(self, now: float) -> None:
+        """Accepts the level the pad settled on during a debounce lockout."""
+
+        self.settle = None
+        self.accept(self.raw, now)
+
+    def accept(self, pressed: bool, now: float) -> None:
+        """Runs the transition to a debounced level."""
+
+        if pressed == self.pressed:
+            return
+        self.pressed = pressed
+        self.locked = now + self.debounce
+
+        if pressed:
+            self.run("press")
+            self.held = 0
+            #A press inside the tap window continues the count, which is settled on release
+            self.cancel()
+            if self.holds:
+                self.timer = self.scheduler.callAt(now + self.holds[0], self.hold) #type: ignore
+            return
+
+        self.run("release")
+        #A release between hold thresholds ends the hold, so the next threshold must not fire
+        self.cancel()
+        if self.held > 0:
+            self.held = 0
+            return
+        if self.taps == 0:
+            return
+
+        self.count += 1
+        if self.count >= self.taps:
+            self.tap(now)
+        else:
+            self.timer = self.scheduler.callAt(now + self.window, self.tap) #type: ignore
+
+    def hold(self, now: float) -> None:
+        """Runs the commands of the hold threshold that passed and waits for the next one."""
+
+        threshold: float = self.holds[self.held]
+        self.held += 1
+        self.count = 0
+        self.timer = None
+        for command in self.commands["hold"]:
+            if command.get("hold", 500) / 1000 == threshold:
+                self.dispatch(command, self.velocity) #type: ignore
+        if self.held < len(self.holds):
+            self.timer = self.scheduler.callAt(now + self.holds[self.held] - threshold, self.hold) #type: ignore
+
+    def tap(self, now: float) -> None:
+        """Runs the commands for the number of taps counted within the window."""
+
+        count: int = self.count
+        self.count = 0
+        self.timer = None
+        for command in self.commands["tap"]:
+            if command.get("taps", 1) == count:
+                self.dispatch(command, self.velocity) #type: ignore
+
+    def cancel(self) -> None:
+        """Cancels the pending hold or tap window."""
+
+        if self.timer != None:
+            self.timer.cancel() #type: ignore
+            self.timer = None
+
+    def run(self, gesture: str) -> None:
+        """Dispatches the commands of an immediate gesture."""
+
+        for command in self.commands[gesture]:
+            self.dispatch(command, self.velocity) #type: ignore
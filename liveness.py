@@ -0,0 +1,68 @@
+from __future__ import annotations #for python3.8 or less
+
+from collections import deque
+
+class RoundTrips:
+    """Rolling history of round trip times."""
+
+    def __init__(self, history: int = 32) -> None:
+        """Initializes an empty history of up to history samples."""
+
+        self.samples: deque[float] = deque(maxlen = history) #type: ignore
+
+    def record(self, rtt: float) -> None:
+        """Adds a round trip time in seconds."""
+
+        self.samples.append(rtt)
+
+    @property
+    def rtt(self) -> float:
+        """Returns the latest round trip time, or zero before the first one."""
+
+        return self.samples[-1] if self.samples else 0.0
+
+    @property
+    def jitter(self) -> float:
+        """Returns the mean absolute difference between consecutive round trip times."""
+
+        if len(self.samples) < 2:
+            return 0.0
+        total: float = 0.0
+        previous: float = self.samples[0]
+        for sample in self.samples:
+            total += abs(sample - previous)
+            previous = sample
+        return total / (len(self.samples) - 1)
+
+class Liveness:
+    """Health of the OBS connection, from periodic application and websocket level pings."""
+
+    def __init__(self, interval: float = 2.0, timeout: float = 5.0, failures: int = 3) -> None:
+        """Initializes health checks every interval seconds, declaring the link dead after
+        failures consecutive checks that were not answered within timeout seconds."""
+
+        self.interval: float = interval
+        self.timeout: float = timeout
+        self.failures: int = failures
+
+        self.application: RoundTrips = RoundTrips()
+        self.protocol: RoundTrips = RoundTrips()
+        self.failed: int = 0
+        self.dead: bool = False
+
+    def check(self, healthy: bool) -> bool:
+        """Records the outcome of a health check and returns if the link is now dead."""
+
+        if healthy:
+            self.failed = 0
+        else:
+            self.failed += 1
+            if self.failed >= self.failures:
+                self.dead = True
+        return self.dead
+
+    def reset(self) -> None:
+        """Starts over for a new connection."""
+
+        self.failed = 0
+        self.dead = False
@@ -1,14 +1,27 @@
 from __future__ import annotations #for python3.8 or less
 
-import websockets, asyncio, yaml, json, sys, argparse
+import websockets, asyncio, yaml, json, sys, argparse, time, os, signal, random
 import mido #type: ignore
 
 from collections import defaultdict as ddict
-from collections.abc import Generator
-from typing import Optional, NoReturn
-
+from collections.abc import Callable, Generator
+from typing import Optional
+
+from animation import Animator, EASINGS
+from audio import TAPERS, taper, dbToMul
+from controllers import HighResolutionDecoder, RELATIVE, relative
+from gestures import Gesture
+from liveness import Liveness
 from messages import Request, Response
-from structures import OBS, Scene, Source
+from metrics import Metrics
+from profiling import Profiler
+from queues import RequestQueue, POLICIES, PRIORITIES, WEIGHTS, OFFLINE
+from recorder import Recorder, Replayer, StampedInput
+from scheduler import Scheduler
+from sequences import Sequence
+from structures import OBS, Scene, Source, TRANSFORM
+from targets import Selector
+from triggers import compileTriggers
 
 def Id() -> Generator[str, None, None]:
     """Unique id generator."""
@@ -18,8 +31,44 @@ def Id() -> Generator[str, None, None]:
         yield str(i)
         i += 1
 
+#Commands that switch the program scene, which wait for or interrupt a running transition
+SWITCHES: tuple = ("transitionToScene", "transitionToPreviousScene", "transitionToProgram")
+
+def validate(command: dict) -> None:
+    """Checks the options of a command and compiles its selector, then does the same for the steps of a sequence."""
+
+    if command["type"] == "animateFilter" and command.get("easing", "linear") not in EASINGS:
+        raise RuntimeError(f"Unknown easing {command['easing']}.")
+    if command["type"] in ("showSources", "hideSources", "toggleSources", "showFilters", "hideFilters", "toggleFilters"):
+        command["selector"] = Selector(command)
+    if command["type"] == "setVolume" and command.get("taper", "cubic") not in TAPERS:
+        raise RuntimeError(f"Unknown taper {command['taper']}.")
+    if command["type"] == "transformSource" and command["property"] not in TRANSFORM and command["property"] != "scale":
+        raise RuntimeError(f"Unknown transform property {command['property']}.")
+    if command["type"] in ("scrubMedia", "transformSource", "editFilter") and command.get("encoding", "twos") not in RELATIVE:
+        raise RuntimeError(f"Unknown encoding {command['encoding']}.")
+    if command.get("during", "queue") not in ("queue", "interrupt"):
+        raise RuntimeError(f"Unknown transition behavior {command['during']}.")
+    if command["type"] == "profile" and command.get("mode", "sample") not in ("sample", "cprofile"):
+        raise RuntimeError(f"Unknown profiling mode {command['mode']}.")
+    if command.get("overflow", "keep") not in POLICIES:
+        raise RuntimeError(f"Unknown overflow policy {command['overflow']}.")
+    if command.get("priority", "settings") not in PRIORITIES:
+        raise RuntimeError(f"Unknown priority {command['priority']}.")
+    if command.get("offline", "drop") not in OFFLINE:
+        raise RuntimeError(f"Unknown offline policy {command['offline']}.")
+
+    #Waits are the only steps without a type
+    for step in command.get("steps", ()):
+        if "type" in step:
+            validate(step)
+
 def getConfig(path: str) -> dict:
-    """Loads config from file at path."""
+    """Loads config from file at path.
+
+    The commands of each trigger and number are compiled into tables indexed by the data value,
+    so between, above and below conditions on the data cost a single lookup.
+    Note commands with a gesture or debounce are gathered per note, behind a single gesture command."""
     
     with open(path, "r") as file:
         if path.endswith(".json"):
@@ -31,37 +80,72 @@ def getConfig(path: str) -> dict:
 
     config: dict = {"note_on": ddict(list),
                      "note_off": ddict(list),
-                     "control_change": ddict(list)}
+                     "control_change": ddict(list),
+                     "control_change_14": ddict(list),
+                     "nrpn": ddict(list),
+                     "rpn": ddict(list),
+                     "pitchwheel": ddict(list)}
+    gestures: dict[int, Gesture] = {} #type: ignore
+    feedback: list[dict] = [] #type: ignore
 
     for command in data:
+        validate(command)
+
+        if command["trigger"] == "note" and command.get("feedback", False):
+            if command["type"] != "transitionToScene" and command["type"] != "previewScene":
+                raise RuntimeError(f"Feedback is not supported for {command['type']}.")
+            feedback.append(command)
+
         if command["trigger"] == "note":
-            if command["style"] == "open" or command["style"] == "latch":
-                config["note_on"][command["value"]].append(command)
-            if command["style"] == "close" or command["style"] == "latch":
-                config["note_off"][command["value"]].append(command)
-            if command["style"] == "mirror" and command["type"] == "mirrorSource":
-                config["note_on"][command["value"]].append({
-                    "type": "showSource",
-                    "target": command["target"],
-                    "trigger": command["trigger"],
-                    "style": "open",
-                    "value": command["value"]})
-                config["note_off"][command["value"]].append({
-                    "type": "hideSource",
-                    "target": command["target"],
-                    "trigger": command["trigger"],
-                    "style": "close",
-                    "value": command["value"]})
+            #Each style runs on the press, the release or both, and mirror splits into showing and hiding the source
+            edges: list[tuple[str, dict]] = [] #type: ignore
+            style: str = command.get("style", "open")
+            if style == "mirror" and command["type"] == "mirrorSource":
+                edges.append(("press", dict(command, type = "showSource", style = "open")))
+                edges.append(("release", dict(command, type = "hideSource", style = "close")))
+            else:
+                if style == "open" or style == "latch":
+                    edges.append(("press", command))
+                if style == "close" or style == "latch":
+                    edges.append(("release", command))
+
+            if "gesture" in command or "debounce" in command:
+                if "between" in command or "above" in command or "below" in command:
+                    raise RuntimeError(f"Conditions are not supported on gestures of note {command['value']}.")
+                if command["value"] not in gestures:
+                    gestures[command["value"]] = Gesture(command["value"])
+                    config["note_on"][command["value"]].append({"type": "gesture", "gesture": gestures[command["value"]], "pressed": True})
+                    config["note_off"][command["value"]].append({"type": "gesture", "gesture": gestures[command["value"]], "pressed": False})
+                if "gesture" in command:
+                    gestures[command["value"]].add(command)
+                else:
+                    for edge, expanded in edges:
+                        gestures[command["value"]].add(dict(expanded, gesture = edge))
+            else:
+                for edge, expanded in edges:
+                    config["note_on" if edge == "press" else "note_off"][command["value"]].append(expanded)
         else:
             config[command["trigger"]][command["value"]].append(command)
             
+    config = compileTriggers(config)
+    config["gestures"] = list(gestures.values())
+    config["feedback"] = feedback
     return config
 
+class ReplayFinished(Exception):
+    """Raised by the frame loop when a replay has nothing left to send."""
+
 class WebsocketHandler:
     """Wrapper for interacting with the OBS websocket."""
 
-    def __init__(self, path: str, port: str, debug: bool, password: str) -> None:
-        """Initializes websocket handler with config from the path."""
+    def __init__(self, path: str, port: str, debug: bool, password: str, rate: float = 60.0,
+                 snapshot: str = "", snapshotInterval: float = 30.0,
+                 record: str = "", replay: str = "", speed: float = 1.0,
+                 profiler: Optional[Profiler] = None, profileSeconds: float = 10.0,
+                 metrics: str = "", capacity: int = 256, window: int = 32,
+                 liveness: Optional[Liveness] = None, backoff: float = 0.5, backoffMax: float = 30.0,
+                 output: str = "") -> None:
+        """Initializes websocket handler with config from the path, and state from the snapshot path if given."""
 
         self.config: dict = getConfig(path)
         if debug == True:
@@ -73,27 +157,110 @@ class WebsocketHandler:
                 break
         if debug == True:
             print(f"Port: {self.port}")
+
+        #Controller output lighting the pads of the program and preview scenes
+        self.output: Optional[mido.ports.BaseOutput] = None
+        if output != "":
+            for option in mido.get_output_names():
+                if option.startswith(output):
+                    self.output = mido.open_output(option)
+                    break
+        self.lit: tuple = (None, None)
+
+        self.recorder: Optional[Recorder] = Recorder(record) if record != "" else None
+        self.replay: str = replay
+        self.speed: float = speed
         self.debug: bool = debug
 
         self._id: Generator[str, None, None] = Id()
 
         self.obs: OBS = OBS(password)
-        self.requests: list[Request] = [] #type: ignore
+        self.requests: RequestQueue = RequestQueue(capacity)
+        self.window: int = window
+        self.wake: asyncio.Event = asyncio.Event()
         self.responses: list[Response] = [] #type: ignore
 
-        self.requests.append(Request(
-            self._id, {"type": "GetAuthRequired"}, self.obs))
-
+        self.animator: Animator = Animator(rate)
+        self.scheduler: Scheduler = Scheduler()
+        for gesture in self.config["gestures"]:
+            gesture.bind(self.dispatch, self.scheduler)
+        self.sequences: dict = {}
+
+        #Latest scene switch held back until the running transition ends
+        self.pendingSwitch: Optional[tuple] = None
+
+        #The T-bar runs the other way after each completed transition, and is held while the fader is between the ends
+        self.tbarFlipped: bool = False
+        self.tbarHeld: bool = False
+
+        #Filters whose settings were asked for by relative encoders, by source and filter name, and if OBS answered
+        self.filterInfo: dict[tuple[str, str], bool] = {} #type: ignore
+
+        self.profiler: Profiler = profiler if profiler != None else Profiler() #type: ignore
+        self.profileSeconds: float = profileSeconds
+
+        self.liveness: Liveness = liveness if liveness != None else Liveness() #type: ignore
+        self.pings: dict[str, asyncio.Future] = {} #type: ignore
+        self.backoff: float = backoff
+        self.backoffMax: float = backoffMax
+
+        self.metricsAddress: str = metrics
+        self.metrics: Metrics = Metrics()
+        self.metricsServer: Optional[asyncio.AbstractServer] = None
+        self.metrics.gauge("request_queue_depth", "Requests waiting to be sent to OBS.", lambda: len(self.requests))
+        self.metrics.gauge("request_queue_high_water", "Most requests ever waiting to be sent to OBS.", lambda: self.requests.highWater)
+        self.metrics.gauge("request_queue_dropped_total", "Requests dropped from the full queue.", lambda: self.requests.dropped, "counter")
+        self.metrics.gauge("request_queue_replaced_total", "Queued requests replaced by a later value.", lambda: self.requests.replaced, "counter")
+        self.metrics.gauge("request_queue_discarded_total", "Requests discarded while disconnected from OBS.",
+                           lambda: self.requests.discarded, "counter")
+        self.metrics.gauge("request_queue_expired_total", "Requests whose time to live ran out while disconnected from OBS.",
+                           lambda: self.requests.expired, "counter")
+        self.metrics.gauge("response_queue_depth", "Replies and events from OBS waiting to be handled.", lambda: len(self.responses))
+        self.metrics.gauge("obs_pending_responses", "Requests sent to OBS that have not been answered.", lambda: len(self.obs.pendingResponses))
+        self.metrics.gauge("animation_ramps", "Ramps currently animating.", lambda: len(self.animator.ramps))
+        self.metrics.gauge("obs_requests_suppressed_total", "Requests skipped because the cached state already matched.",
+                           lambda: self.obs.suppressed, "counter")
+        self.metrics.gauge("obs_rtt_seconds", "Latest round trip time of an application level ping.",
+                           lambda: self.liveness.application.rtt)
+        self.metrics.gauge("obs_rtt_jitter_seconds", "Mean variation of application level ping round trip times.",
+                           lambda: self.liveness.application.jitter)
+        self.metrics.gauge("websocket_rtt_seconds", "Latest round trip time of a websocket ping.",
+                           lambda: self.liveness.protocol.rtt)
+        self.metrics.gauge("websocket_rtt_jitter_seconds", "Mean variation of websocket ping round trip times.",
+                           lambda: self.liveness.protocol.jitter)
+        self.metrics.gauge("obs_stream_kbits_per_second", "Bitrate of the stream in the latest status.",
+                           lambda: self.obs.streamHistory.latest("kbits-per-sec"))
+        self.metrics.gauge("obs_stream_dropped_ratio", "Share of frames dropped over the stream status history.",
+                           lambda: self.obs.streamHistory.droppedRatio())
+        self.metrics.gauge("frames_skipped_total", "Frames skipped because the handler loop fell behind.",
+                           lambda: self.animator.skipped, "counter")
+
+        self.snapshotPath: str = snapshot
+        self.snapshotInterval: float = snapshotInterval
+        self.snapshotData: str = ""
+        if self.snapshotPath != "":
+            self.load()
+        self.decoder: HighResolutionDecoder = HighResolutionDecoder(
+            self.config["control_change_14"].keys(),
+            bool(self.config["nrpn"]) or bool(self.config["rpn"]))
 
     async def read(self, websocket: websockets.WebSocketClientProtocol) -> None:
         """Asynchronously reads responses from the OBS websocket."""
 
         try:
             while True:
-                msg = await websocket.recv()
+                try:
+                    msg = await websocket.recv()
+                except websockets.ConnectionClosed:
+                    return
                 data = json.loads(msg)
                 if self.debug:
                     print(data)
+                if "message-id" in data:
+                    self.metrics.response(data, time.perf_counter())
+                    ping = self.pings.pop(data["message-id"], None)
+                    if ping != None and not ping.done():
+                        ping.set_result(time.perf_counter())
                 self.responses.append(Response(data, self.obs))
         except asyncio.CancelledError:
             return
@@ -105,45 +272,324 @@ class WebsocketHandler:
             print(request)
 
         for msg in request:
-            await websocket.send(json.dumps(msg))
+            #Registered before sending, since the reply can be handled while this task waits on the socket
             self.obs.pendingResponses[msg["message-id"]] = msg
+            self.metrics.request(msg, time.perf_counter())
+            await websocket.send(json.dumps(msg))
+
+    async def write(self, websocket: websockets.WebSocketClientProtocol) -> None:
+        """Asynchronously sends queued requests while fewer than the window are unanswered."""
+
+        try:
+            while True:
+                await self.wake.wait()
+                self.wake.clear()
+                while len(self.requests) > 0 and len(self.obs.pendingResponses) < self.window:
+                    #Only the handshake goes out until OBS accepted the connection
+                    request = self.requests.pop(len(WEIGHTS) if self.obs.authenticated else PRIORITIES["control"] + 1)
+                    if request == None:
+                        break
+                    #A request that fails to format is reported and skipped, so the connection stays up
+                    try:
+                        msgs = request.format()
+                    except Exception as error:
+                        print(f"Could not format {request.data['type']}: {error!r}")
+                        msgs = []
+                    if request.callback != None:
+                        try:
+                            request.callback(msgs)
+                        except Exception as error:
+                            print(f"Callback of {request.data['type']} failed: {error!r}")
+                    await self.send(websocket, msgs)
+        except (asyncio.CancelledError, websockets.ConnectionClosed):
+            return
+
+    async def pingApplication(self, websocket: websockets.WebSocketClientProtocol) -> bool:
+        """Sends a GetVersion request outside the queue and records its round trip, returning if it was answered."""
+
+        msgs: list[dict] = Request(self._id, {"type": "GetVersion"}, self.obs).format() #type: ignore
+        ping: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.pings[msgs[0]["message-id"]] = ping
+        try:
+            sent: float = time.perf_counter()
+            await self.send(websocket, msgs)
+            self.liveness.application.record(await asyncio.wait_for(ping, self.liveness.timeout) - sent)
+            return True
+        except (asyncio.TimeoutError, websockets.ConnectionClosed):
+            self.pings.pop(msgs[0]["message-id"], None)
+            return False
+
+    async def pingProtocol(self, websocket: websockets.WebSocketClientProtocol) -> bool:
+        """Sends a websocket ping and records its round trip, returning if it was answered."""
+
+        try:
+            sent: float = time.perf_counter()
+            await asyncio.wait_for(await websocket.ping(), self.liveness.timeout)
+            self.liveness.protocol.record(time.perf_counter() - sent)
+            return True
+        except (asyncio.TimeoutError, websockets.ConnectionClosed):
+            return False
+
+    async def monitor(self, websocket: websockets.WebSocketClientProtocol) -> None:
+        """Periodically checks that OBS answers, closing the connection once it is declared dead."""
+
+        try:
+            while True:
+                await asyncio.sleep(self.liveness.interval)
+                application, protocol = await asyncio.gather(self.pingApplication(websocket), self.pingProtocol(websocket))
+                if self.liveness.check(application and protocol):
+                    print("OBS stopped answering health checks, closing the connection.")
+                    await websocket.close()
+                    return
+        except asyncio.CancelledError:
+            return
+
+    async def run(self) -> None:
+        """Parses MIDI while keeping a connection to OBS, reconnecting with backoff when it is lost.
+
+        Runs until interrupted, or when replaying, until the replay finished and its requests were answered."""
+
+        if self.replay != "":
+            midiInput = Replayer(self.replay, self.speed, mido.Message.from_bytes)
+        else:
+            midiInput = StampedInput(self.port, mido.open_input)
+
+        if self.metricsAddress != "":
+            self.metricsServer = await self.metrics.serve(self.metricsAddress)
+
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self.profile)
+        except (AttributeError, NotImplementedError):
+            #No SIGUSR1 on Windows, profile with a control command instead
+            pass
+
+        if self.snapshotPath != "" and self.snapshotInterval > 0:
+            self.scheduler.callAt(time.perf_counter() + self.snapshotInterval, self.autosave)
+
+        with midiInput as port:
+            attempt: int = 0
+            while True:
+                try:
+                    async with websockets.connect("ws://localhost:4444") as websocket:
+                        await self.session(websocket, port)
+                except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                    print(f"Disconnected from OBS: {e}")
+                except ReplayFinished:
+                    self.summarize(port) #type: ignore
+                    return
+
+                if self.obs.authenticated:
+                    attempt = 0
+                self.disconnect()
+
+                #Exponential backoff with jitter, parsing MIDI in the meantime
+                delay: float = min(self.backoffMax, self.backoff * 2 ** attempt)
+                delay = random.uniform(delay / 2, delay)
+                attempt += 1
+                print(f"Reconnecting in {delay:.1f} seconds.")
+                end: float = time.perf_counter() + delay
+                try:
+                    while time.perf_counter() < end:
+                        await self.frame(port)
+                except ReplayFinished:
+                    self.summarize(port) #type: ignore
+                    return
+
+    def summarize(self, replayer: Replayer) -> None:
+        """Prints what a finished replay sent, for comparing load test runs."""
+
+        elapsed: float = (time.perf_counter_ns() - replayer.start) / 1e9 #type: ignore
+        print(f"Replay finished: {len(replayer.records)} messages in {elapsed:.2f} seconds, "
+              f"{self.obs.suppressed} requests suppressed, {self.requests.replaced} replaced, "
+              f"{self.requests.dropped} dropped, {self.requests.discarded} discarded offline, {self.requests.expired} expired.")
+
+    async def session(self, websocket: websockets.WebSocketClientProtocol, port: mido.ports.BaseInput) -> None:
+        """Authenticates and runs the handler loop on a connection until it is lost."""
+
+        self.metrics.connects += 1
+        if self.metrics.connects > 1:
+            self.metrics.reconnects += 1
+
+        self.requests.connect()
+        self.requests.push(Request(
+            self._id, {"type": "GetAuthRequired"}, self.obs))
+
+        readTask = asyncio.create_task(self.read(websocket))
+        writeTask = asyncio.create_task(self.write(websocket))
+        self.liveness.reset()
+        monitorTask = asyncio.create_task(self.monitor(websocket))
+
+        try:
+            while not (readTask.done() or writeTask.done() or monitorTask.done()):
+                await self.frame(port)
+        finally:
+            readTask.cancel()
+            writeTask.cancel()
+            monitorTask.cancel()
+
+        raise ConnectionError("Connection to OBS lost.")
+
+    async def frame(self, port: StampedInput | Replayer) -> None:
+        """Waits for the next frame, then parses MIDI, runs timers and animations, and handles responses."""
+
+        now = await self.animator.wait()
+        for msg in port.iter_pending():
+            self.parse(msg, port.arrival)
+
+        #A replay ends once its sequences, ramps and requests are done, and the requests were answered or can no longer be
+        if isinstance(port, Replayer) and port.finished and not self.obs.requests and not self.obs.pendingResponses \
+           and not self.animator.ramps and not self.animator.frame and all(sequence.done for sequence in self.sequences.values()) \
+           and (len(self.requests) == 0 or not self.requests.online):
+            raise ReplayFinished()
+
+        self.scheduler.runDue(now)
+
+        if self.pendingSwitch != None and not self.obs.transition.isRunning(now):
+            command, data, maximum, callback = self.pendingSwitch #type: ignore
+            self.pendingSwitch = None
+            self.dispatch(command, data, maximum, callback)
+
+        for key, request in self.animator.tick(now):
+            self.requests.push(Request(self._id, request, self.obs, None, "latest", key, "latest"))
+
+        requests, self.obs.requests = self.obs.requests, []
+        for request in requests:
+            self.requests.push(Request(self._id, request, self.obs))
+
+        responses, self.responses = self.responses, []
+        for response in responses:
+            response.handle()
 
-    async def run(self) -> NoReturn:
-        """Connects to the OBS websocket and endlessly parses MIDI to handle requests and responses."""
+        if self.output != None:
+            self.feedback()
 
-        with mido.open_input(self.port) as port:
-            async with websockets.connect("ws://localhost:4444") as websocket:
+        if len(self.requests) > 0:
+            self.wake.set()
 
-                readTask = asyncio.create_task(self.read(websocket))
+        self.metrics.frames.observe(time.perf_counter() - now)
 
-                while True:
-                    await asyncio.sleep(0.1)
-                    for msg in port.iter_pending():
-                        self.parse(msg)
+    def feedback(self) -> None:
+        """Lights the pads of the program and preview scenes on the controller, when either changed."""
 
-                    for request in self.obs.requests:
-                        self.requests.append(Request(self._id, request, self.obs))
-                        self.obs.requests.remove(request)
+        program: Optional[str] = self.obs.currentScene.name if self.obs.currentScene != None else None #type: ignore
+        preview: Optional[str] = self.obs.previewScene.name if self.obs.previewScene != None else None #type: ignore
+        if (program, preview) == self.lit:
+            return
+        self.lit = (program, preview)
+
+        for command in self.config["feedback"]:
+            active: bool = command["target"] == (program if command["type"] == "transitionToScene" else preview)
+            self.output.send(mido.Message("note_on", channel = command.get("channel", 0), note = command["value"], #type: ignore
+                                          velocity = command.get("lit", 127) if active else 0))
+
+    def disconnect(self) -> None:
+        """Fails the requests OBS can no longer answer and parks the queue until the connection is back."""
+
+        responses, self.responses = self.responses, []
+        for response in responses:
+            response.handle()
+
+        for messageId in list(self.obs.pendingResponses):
+            error: dict = {"message-id": messageId, "status": "error", "error": "Connection to OBS lost."}
+            callback = self.obs.callbacks.pop(messageId, None)
+            if callback != None:
+                callback(error)
+            expectation = self.obs.expectations.pop(messageId, None)
+            if expectation != None:
+                settle, value = expectation
+                settle(value, False)
+        self.obs.pendingResponses.clear()
+        self.obs.authenticated = False
+
+        self.metrics.sent.clear()
+        self.pings.clear()
+        self.requests.disconnect()
+
+    def load(self) -> None:
+        """Loads the OBS state from the snapshot file, if there is a compatible one."""
+
+        try:
+            with open(self.snapshotPath, "r") as file:
+                self.snapshotData = file.read()
+            if not self.obs.restore(json.loads(self.snapshotData)):
+                print("Ignoring snapshot from an incompatible version.")
+                self.snapshotData = ""
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError) as e:
+            print(f"Ignoring unreadable snapshot: {e}")
+            self.snapshotData = ""
+
+        if self.debug:
+            print(f"Snapshot: {self.obs.snapshot()}")
+
+    def save(self) -> None:
+        """Writes the OBS state to the snapshot file if it changed since the last save."""
+
+        if self.snapshotPath == "" or not self.obs.scenes:
+            return
+
+        data: str = json.dumps(self.obs.snapshot(), separators = (",", ":"))
+        if data == self.snapshotData:
+            return
+
+        with open(self.snapshotPath + ".tmp", "w") as file:
+            file.write(data)
+        os.replace(self.snapshotPath + ".tmp", self.snapshotPath)
+        self.snapshotData = data
+
+    def profile(self, seconds: float = 0.0, mode: str = "sample") -> None:
+        """Opens a profiling window that closes itself after seconds, or the configured default."""
+
+        if self.profiler.running:
+            return
+
+        print(f"Profiling ({mode}) for {seconds or self.profileSeconds} seconds.")
+        self.profiler.start(mode)
+        self.scheduler.callAt(time.perf_counter() + (seconds or self.profileSeconds), self.endProfile)
+
+    def endProfile(self, now: float) -> None:
+        """Closes the profiling window and reports where its output went."""
+
+        print(f"Profile written to {self.profiler.stop()}.")
+
+    def close(self) -> None:
+        """Finishes the recording, if any, and saves the snapshot on shutdown."""
+
+        if self.recorder != None:
+            self.recorder.close() #type: ignore
+            self.recorder = None
+        if self.profiler.running:
+            self.endProfile(time.perf_counter())
+        if self.output != None:
+            self.output.close() #type: ignore
+            self.output = None
+        self.save()
+
+        print(f"Suppressed {self.obs.suppressed} redundant requests.")
 
-                    for request in self.requests:
-                        await self.send(websocket, request.format())
-                        self.requests.remove(request)
+    def autosave(self, now: float) -> None:
+        """Saves the snapshot and schedules the next periodic save."""
 
-                    for response in self.responses:
-                        response.handle()
-                        self.responses.remove(response)
+        self.save()
+        self.scheduler.callAt(now + self.snapshotInterval, self.autosave)
 
-                await readTask
+    def parse(self, msg: mido.Message, arrival: Optional[int] = None) -> None:
+        """Parses MIDI message and creates requests based off of the loaded configuration.
 
-    def parse(self, msg: mido.Message) -> None:
-        """Parses MIDI message and creates requests based off of the loaded configuration."""
+        Arrival is the perf_counter_ns time the message came in, which recordings are stamped with and gestures are timed from."""
 
         if self.debug:
             print(msg)
 
+        if self.recorder != None:
+            self.recorder.record(msg.bytes(), arrival) #type: ignore
+
         trigger: str = msg.type
+        self.metrics.event(trigger)
         value: int = -1
         data: int = -1
+        maximum: int = 127
 
         if trigger == "note_on" or trigger == "note_off":
             value = msg.note
@@ -151,15 +597,269 @@ class WebsocketHandler:
         elif trigger == "control_change":
             value = msg.control
             data = msg.value
+            if self.decoder.feed(msg.channel, value, data):
+                self.metrics.event(self.decoder.trigger)
+                for command in self.config[self.decoder.trigger][self.decoder.number][self.decoder.value]:
+                    self.dispatch(command, self.decoder.value, 16383, None, "latest")
+        elif trigger == "pitchwheel":
+            value = msg.channel
+            data = msg.pitch + 8192
+            maximum = 16383
         else:
             return
 
-        for command in self.config[trigger][value]:
+        #Notes are never dropped, continuous controls only need their latest value
+        policy: str = "keep" if trigger == "note_on" or trigger == "note_off" else "latest"
+        now: Optional[float] = arrival / 1e9 if arrival != None else None #type: ignore
+        for command in self.config[trigger][value][data]:
+            self.dispatch(command, data, maximum, None, policy, now)
+
+    def dispatch(self, command: dict, data: int, maximum: int = 127, callback: Optional[Callable] = None, policy: str = "keep",
+                 now: Optional[float] = None) -> None:
+        """Runs a configured command, either locally or as a request to OBS.
+
+        The callback, if any, receives the messages sent for the command, or none if it ran locally.
+        The policy applies while the request waits in a full queue, unless the command overrides it.
+        Now is the perf_counter time the triggering message arrived, if known, which gesture edges are timed from."""
+
+        if command["type"] == "animateFilter":
+            self.animate(command, data, maximum)
+        elif command["type"] == "sequence":
+            self.sequence(command, data, maximum)
+        elif command["type"] == "setVolume":
+            self.volume(command, data, maximum)
+        elif command["type"] == "tBar":
+            self.tbar(command, data, maximum)
+        elif command["type"] == "transformSource":
+            self.transform(command, data, maximum)
+        elif command["type"] == "scrubMedia":
+            self.scrub(command, data)
+        elif command["type"] == "editFilter" and "encoding" in command:
+            self.edit(command, data)
+        elif command["type"] == "gesture":
+            #A note on with no velocity is a release
+            command["gesture"].edge(command["pressed"] and data > 0, data, now if now != None else time.perf_counter())
+        elif command["type"] == "profile":
+            self.profile(command.get("seconds", 0.0), command.get("mode", "sample"))
+        elif command["type"] in SWITCHES and command.get("during", "queue") == "queue" \
+             and self.obs.transition.isRunning(time.perf_counter()):
+            #Only the latest switch requested during a transition runs after it
+            if self.pendingSwitch != None and self.pendingSwitch[3] != None:
+                self.pendingSwitch[3]([])
+            self.pendingSwitch = (command, data, maximum, callback)
+            return
+        else:
             request = command.copy()
             request["data"] = data
-            self.requests.append(Request(self._id, request, self.obs))
-        
-        
+            request["maximum"] = maximum
+            key: object = id(command)
+            if command["type"] in SWITCHES:
+                #Queued scene switches collapse to the latest one
+                policy = "latest"
+                key = "scene"
+            self.requests.push(Request(self._id, request, self.obs, callback,
+                                       command.get("overflow", policy), key,
+                                       command.get("offline", "drop"), command.get("ttl", 10000) / 1000))
+            return
+
+        if callback != None:
+            callback([])
+
+    def sequence(self, command: dict, data: int, maximum: int = 127) -> None:
+        """Starts a sequence, cancelling the one already running under the same name."""
+
+        name = command.get("name", id(command))
+        running: Optional[Sequence] = self.sequences.pop(name, None)
+        if running != None and not running.done:
+            running.cancel() #type: ignore
+            if command.get("retrigger", "restart") == "cancel":
+                return
+
+        sequence: Sequence = Sequence(command["steps"], data, maximum, self.dispatch, self.scheduler, self.obs)
+        self.sequences[name] = sequence
+        sequence.advance(time.perf_counter())
+
+    def volume(self, command: dict, data: int, maximum: int = 127) -> None:
+        """Sets the volume of a source to a fixed level in dB, or to the fader position through its taper.
+
+        Only the latest volume of each source in a frame is sent."""
+
+        if "db" in command:
+            volume: float = dbToMul(command["db"])
+        else:
+            volume = taper(command.get("taper", "cubic"), maximum)[data]
+        self.animator.post(("volume", command["target"]), {
+            "type": "setVolume",
+            "target": command["target"],
+            "volume": volume})
+
+    def tbar(self, command: dict, data: int, maximum: int = 127) -> None:
+        """Moves the studio mode T-bar to the fader position, with one update per frame.
+
+        The T-bar is released when the fader reaches either end after moving, which completes or cancels the transition,
+        with a request of its own so no later position replaces it; after a completed one the fader runs the other way,
+        unless alternate is disabled. Repeated end values are ignored."""
+
+        position: float = data / maximum
+        if self.tbarFlipped:
+            position = 1.0 - position
+
+        if 0.0 < position < 1.0:
+            self.tbarHeld = True
+            self.animator.post(("tbar",), {
+                "type": "setTBar",
+                "position": position,
+                "release": False})
+            return
+        if not self.tbarHeld:
+            return
+
+        self.tbarHeld = False
+        self.animator.discard(("tbar",))
+        self.requests.push(Request(self._id, {
+            "type": "setTBar",
+            "position": position,
+            "release": True},
+            self.obs))
+        if position >= 1.0 and command.get("alternate", True):
+            self.tbarFlipped = not self.tbarFlipped
+
+    def transform(self, command: dict, data: int, maximum: int = 127) -> None:
+        """Sets a transform property of a scene item from a fader mapped onto range,
+        or moves it by the steps of a relative encoder, times step each.
+
+        The properties set within a frame, such as both axes of an XY pad, are merged into a single update."""
+
+        source = self.obs.getSource(command["target"])
+        if source == None:
+            return
+        if source.transform == None: #type: ignore
+            #Repeated queries for the item collapse while they wait
+            self.requests.push(Request(self._id, {
+                "type": "GetSceneItemProperties",
+                "scene": source.scene.name, #type: ignore
+                "target": source.name}, #type: ignore
+                self.obs, None, "latest", ("properties", source.scene.name, source.name))) #type: ignore
+            #Relative steps would start from the defaults, so they are dropped until the transform is known
+            if "encoding" in command:
+                return
+        transform = source.getTransform() #type: ignore
+
+        names: tuple = ("scaleX", "scaleY") if command["property"] == "scale" else (command["property"],)
+        if "encoding" in command:
+            value: float = transform.get(names[0]) + relative(data, command["encoding"]) * command.get("step", 1)
+        else:
+            low, high = command.get("range", [0, 1])
+            value = low + (high - low) * data / maximum
+
+        properties: dict = {}
+        for name in names:
+            transform.set(name, value)
+            properties[name] = value
+        self.animator.merge(("transform", source.scene.name, source.name), { #type: ignore
+            "type": "setTransform",
+            "scene": source.scene.name, #type: ignore
+            "target": source.name}, #type: ignore
+            "properties", properties)
+
+    def scrub(self, command: dict, data: int) -> None:
+        """Moves a media source by the steps of a relative encoder, times step milliseconds each.
+
+        The steps of a frame add up into a single ScrubMedia."""
+
+        self.animator.accumulate(("media", command["target"]), {
+            "type": "scrubMedia",
+            "target": command["target"]},
+            "offset", relative(data, command.get("encoding", "twos")) * command.get("step", 100))
+
+    def edit(self, command: dict, data: int) -> None:
+        """Moves a filter setting by the steps of a relative encoder, times step each, within range if given.
+
+        The steps add up in the cached settings, so a frame sends a single absolute value however many came in.
+        The settings are asked from OBS on first use, and steps are dropped until they arrive.
+        A running ramp of the setting stops where it is and the steps continue from there."""
+
+        source = self.obs.getSource(command["targetSource"])
+        if source == None:
+            return
+        _filter = source.getFilter(command["targetFilter"]) #type: ignore
+        if _filter == None:
+            return
+
+        name: tuple[str, str] = (command["targetSource"], command["targetFilter"]) #type: ignore
+        known: Optional[bool] = self.filterInfo.get(name)
+        if known != True:
+            if known == None:
+                self.filterInfo[name] = False
+                self.requests.push(Request(self._id, {
+                    "type": "GetSourceFilterInfo",
+                    "targetSource": command["targetSource"],
+                    "targetFilter": command["targetFilter"]},
+                    self.obs, lambda msgs, name = name: self.queried(name, msgs)))
+            return
+
+        key: tuple = ("filter", command["targetSource"], command["targetFilter"], command["targetSetting"])
+        value: Optional[float] = self.animator.current(key)
+        self.animator.stop(key)
+        if value == None:
+            #OBS leaves settings at their defaults out of the filter settings
+            value = _filter.settings.get(command["targetSetting"], command.get("default", 0)) #type: ignore
+        value += relative(data, command["encoding"]) * command.get("step", 1) #type: ignore
+        if "range" in command:
+            low, high = command["range"]
+            value = min(max(value, low), high) #type: ignore
+        _filter.settings[command["targetSetting"]] = value #type: ignore
+
+        self.animator.post(key, {
+            "type": "setFilterSetting",
+            "targetSource": command["targetSource"],
+            "targetFilter": command["targetFilter"],
+            "targetSetting": command["targetSetting"],
+            "value": value})
+
+    def queried(self, name: tuple[str, str], msgs: list[dict]) -> None: #type: ignore
+        """Waits for the answer to the settings query of a filter, forgetting the query if it was never sent."""
+
+        if not msgs:
+            self.filterInfo.pop(name, None)
+        for msg in msgs:
+            self.obs.callbacks[msg["message-id"]] = lambda data, name = name: self.answered(name, data)
+
+    def answered(self, name: tuple[str, str], data: dict) -> None: #type: ignore
+        """Lets relative encoders move the settings of a filter once OBS answered, or asks again next time if it failed."""
+
+        if data["status"] == "error":
+            self.filterInfo.pop(name, None)
+        else:
+            self.filterInfo[name] = True
+
+    def animate(self, command: dict, data: int, maximum: int = 127) -> None:
+        """Starts or retargets a ramp of a filter setting toward the commanded value."""
+
+        key: tuple = ("filter", command["targetSource"], command["targetFilter"], command["targetSetting"])
+
+        if "to" in command:
+            target: float = command["to"]
+        else:
+            low, high = command.get("range", [0, 127])
+            target = low + (high - low) * data / maximum
+
+        start: Optional[float] = self.animator.current(key)
+        if start == None:
+            start = target
+            source = self.obs.getSource(command["targetSource"])
+            if source != None:
+                _filter = source.getFilter(command["targetFilter"]) #type: ignore
+                if _filter != None:
+                    start = _filter.settings.get(command["targetSetting"], target) #type: ignore
+
+        self.animator.animate(key, {
+            "type": "setFilterSetting",
+            "targetSource": command["targetSource"],
+            "targetFilter": command["targetFilter"],
+            "targetSetting": command["targetSetting"]},
+            start, target, command.get("duration", 0) / 1000, command.get("easing", "linear"), time.perf_counter()) #type: ignore
+
 
 if __name__ == "__main__":
     parser: argparse.ArgumentParser = argparse.ArgumentParser()
@@ -167,8 +867,37 @@ if __name__ == "__main__":
     parser.add_argument("--port", type = str, default = "")
     parser.add_argument("--debug", action = "store_true")
     parser.add_argument("--password", type = str, default = "")
+    parser.add_argument("--rate", type = float, default = 60.0)
+    parser.add_argument("--snapshot", type = str, default = "")
+    parser.add_argument("--snapshot-interval", type = float, default = 30.0)
+    parser.add_argument("--record", type = str, default = "")
+    parser.add_argument("--replay", type = str, default = "")
+    parser.add_argument("--speed", type = float, default = 1.0)
+    parser.add_argument("--profile-dir", type = str, default = "profiles")
+    parser.add_argument("--profile-interval", type = float, default = 5.0)
+    parser.add_argument("--profile-seconds", type = float, default = 10.0)
+    parser.add_argument("--metrics", type = str, default = "")
+    parser.add_argument("--queue", type = int, default = 256)
+    parser.add_argument("--window", type = int, default = 32)
+    parser.add_argument("--ping-interval", type = float, default = 2.0)
+    parser.add_argument("--ping-timeout", type = float, default = 5.0)
+    parser.add_argument("--ping-failures", type = int, default = 3)
+    parser.add_argument("--backoff", type = float, default = 0.5)
+    parser.add_argument("--backoff-max", type = float, default = 30.0)
+    parser.add_argument("--output", type = str, default = "")
 
     args: argparse.Namespace = parser.parse_args()
 
-    websocketHandler: WebsocketHandler = WebsocketHandler(args.config, args.port, args.debug, args.password)
-    asyncio.get_event_loop().run_until_complete(websocketHandler.run())
+    websocketHandler: WebsocketHandler = WebsocketHandler(args.config, args.port, args.debug, args.password, args.rate,
+                                                          args.snapshot, args.snapshot_interval,
+                                                          args.record, args.replay, args.speed,
+                                                          Profiler(args.profile_dir, args.profile_interval / 1000), args.profile_seconds,
+                                                          args.metrics, args.queue, args.window,
+                                                          Liveness(args.ping_interval, args.ping_timeout, args.ping_failures),
+                                                          args.backoff, args.backoff_max, args.output)
+    try:
+        asyncio.get_event_loop().run_until_complete(websocketHandler.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        websocketHandler.close()
@@ -1,21 +1,125 @@
 from __future__ import annotations #for python3.8 or less
 
+import time
+
 from hashlib import sha256
 from base64 import b64encode
 
-from collections.abc import Generator
+from collections.abc import Callable, Generator
+from typing import Optional
 
-from structures import OBS, Scene, Source, Filter
+from structures import OBS, Scene, Source, Filter, Output, TRANSFORM
 
 class Request:
     """Structure that represents a request to be sent to OBS."""
 
-    def __init__(self, _id: Generator[str, None, None], data: dict, obs: OBS) -> None:
-        """Initializes a request to be sent to OBS."""
+    def __init__(self, _id: Generator[str, None, None], data: dict, obs: OBS, callback: Optional[Callable] = None,
+                 policy: str = "keep", key: object = None, offline: str = "drop", ttl: float = 10.0) -> None:
+        """Initializes a request to be sent to OBS, with an optional callback for the formatted messages.
+
+        The policy and key decide what happens to the request while it waits in a full queue, and
+        the offline policy and ttl in seconds what happens to it while OBS is disconnected."""
 
         self.id: Generator[str, None, None] = _id
         self.data: dict = data
         self.obs: OBS = obs
+        self.callback: Optional[Callable] = callback
+        self.policy: str = policy
+        self.key: object = key
+        self.priority: Optional[int] = None
+        self.offline: str = offline
+        self.ttl: float = ttl
+        self.expires: float = 0.0
+
+    def getFilter(self) -> Optional[Filter]:
+        """Returns the cached filter targeted by the request, if it exists."""
+
+        source = self.obs.getSource(self.data["targetSource"])
+        if source != None:
+            return source.getFilter(self.data["targetFilter"]) #type: ignore
+        return None
+
+    def redundant(self, target: Optional[Source | Filter], visible: bool) -> bool:
+        """Returns if the cached target already has the visibility, unless the command forces the request."""
+
+        if target == None or self.data.get("force", False):
+            return False
+        if target.isVisible() == visible: #type: ignore
+            self.obs.suppressed += 1
+            return True
+        return False
+
+    def expect(self, msg: dict, target: Optional[Source | Filter], visible: bool) -> None:
+        """Optimistically applies the visibility a message will set, until OBS confirms or rejects it."""
+
+        if target != None:
+            target.expectVisible(visible) #type: ignore
+            self.obs.expectations[msg["message-id"]] = (target.settleVisible, visible) #type: ignore
+
+    def locate(self, msg: dict, source: Optional[Source]) -> None:
+        """Names the scene holding the source in the message, when it is nested below the current scene."""
+
+        if source != None and source.scene is not self.obs.currentScene: #type: ignore
+            msg["scene-name"] = source.scene.name #type: ignore
+
+    def switch(self, msgs: list[dict], output: Output, mtype: str, suffix: str) -> None: #type: ignore
+        """Starts, stops or toggles an output, deciding from its cached state."""
+
+        if mtype.startswith("toggle"):
+            if output.state == None:
+                #Without a known state OBS toggles it
+                msg: dict = {"message-id": next(self.id)}
+                msg["request-type"] = "StartStop" + suffix
+                msgs.append(msg)
+                return
+            start: bool = not output.isActive()
+        else:
+            start = mtype.startswith("start")
+            if output.state != None and output.isActive() == start and not self.data.get("force", False):
+                self.obs.suppressed += 1
+                return
+
+        state: str = "starting" if start else "stopping"
+        output.expectState(state)
+        msg = {"message-id": next(self.id)}
+        msg["request-type"] = ("Start" if start else "Stop") + suffix
+        self.obs.expectations[msg["message-id"]] = (output.settleState, state)
+        msgs.append(msg)
+
+    def switchScene(self, msgs: list[dict], target: str) -> None: #type: ignore
+        """Switches to the target scene, applying the transition and duration overrides of the command first.
+
+        Overridden settings are set back by the handler of the end of the transition."""
+
+        transition = self.obs.transition
+        if self.obs.currentScene != None and self.obs.currentScene.name == target and not transition.isRunning(time.perf_counter()) \
+           and not self.data.get("force", False): #type: ignore
+            self.obs.suppressed += 1
+            return
+
+        if "transition" in self.data and self.data["transition"] != transition.name:
+            if transition.restore == None:
+                transition.restore = (transition.name, transition.duration)
+            transition.name = self.data["transition"]
+            msg: dict = {"message-id": next(self.id)}
+            msg["request-type"] = "SetCurrentTransition"
+            msg["transition-name"] = self.data["transition"]
+            msgs.append(msg)
+
+        if "duration" in self.data and self.data["duration"] != transition.duration:
+            if transition.restore == None:
+                transition.restore = (transition.name, transition.duration)
+            transition.duration = self.data["duration"]
+            msg = {"message-id": next(self.id)}
+            msg["request-type"] = "SetTransitionDuration"
+            msg["duration"] = self.data["duration"]
+            msgs.append(msg)
+
+        msg = {"message-id": next(self.id)}
+        msg["request-type"] = "SetCurrentScene"
+        msg["scene-name"] = target
+        msgs.append(msg)
+        transition.begin(target, time.perf_counter())
 
     def format(self) -> list[dict]: #type: ignore
         """Returns a list of formatted messages to send to OBS."""
@@ -27,18 +131,26 @@ class Request:
 
         #Configurable Interactions
         if mtype == "showSource":
-            msg: dict = {"message-id": next(self.id)}
-            msg["request-type"] = "SetSceneItemRender"
-            msg["source"] = self.data["target"]
-            msg["render"] = True
-            msgs.append(msg)
+            source = self.obs.getSource(self.data["target"])
+            if not self.redundant(source, True):
+                msg: dict = {"message-id": next(self.id)}
+                msg["request-type"] = "SetSceneItemRender"
+                msg["source"] = self.data["target"]
+                msg["render"] = True
+                self.locate(msg, source)
+                self.expect(msg, source, True)
+                msgs.append(msg)
 
         elif mtype == "hideSource":
-            msg = {"message-id": next(self.id)}
-            msg["request-type"] = "SetSceneItemRender"
-            msg["source"] = self.data["target"]
-            msg["render"] = False
-            msgs.append(msg)
+            source = self.obs.getSource(self.data["target"])
+            if not self.redundant(source, False):
+                msg = {"message-id": next(self.id)}
+                msg["request-type"] = "SetSceneItemRender"
+                msg["source"] = self.data["target"]
+                msg["render"] = False
+                self.locate(msg, source)
+                self.expect(msg, source, False)
+                msgs.append(msg)
 
         elif mtype == "toggleSource":
             source = self.obs.getSource(self.data["target"])
@@ -47,6 +159,8 @@ class Request:
                 msg["request-type"] = "SetSceneItemRender"
                 msg["source"] = self.data["target"]
                 msg["render"] = not source.isVisible() #type: ignore
+                self.locate(msg, source)
+                self.expect(msg, source, msg["render"])
                 msgs.append(msg)
 
         elif mtype == "showAllSources":
@@ -56,6 +170,7 @@ class Request:
                     msg["request-type"] = "SetSceneItemRender"
                     msg["source"] = source.name
                     msg["render"] = True
+                    self.expect(msg, source, True)
                     msgs.append(msg)
 
         elif mtype == "hideAllSources":
@@ -65,47 +180,71 @@ class Request:
                     msg["request-type"] = "SetSceneItemRender"
                     msg["source"] = source.name
                     msg["render"] = False
+                    self.expect(msg, source, False)
+                    msgs.append(msg)
+
+        elif mtype == "showSources" or mtype == "hideSources" or mtype == "toggleSources":
+            for scene, source in self.data["selector"].sources(self.obs):
+                visible: bool = mtype == "showSources" or (mtype == "toggleSources" and not source.isVisible())
+                if mtype == "toggleSources" or not self.redundant(source, visible):
+                    msg = {"message-id": next(self.id)}
+                    msg["request-type"] = "SetSceneItemRender"
+                    msg["scene-name"] = scene.name
+                    msg["source"] = source.name
+                    msg["render"] = visible
+                    self.expect(msg, source, visible)
                     msgs.append(msg)
 
         elif mtype == "transitionToScene":
-            msg = {"message-id": next(self.id)}
-            msg["request-type"] = "SetCurrentScene"
-            msg["scene-name"] = self.data["target"]
-            msgs.append(msg)
+            self.switchScene(msgs, self.data["target"])
 
         elif mtype == "transitionToPreviousScene":
             if self.obs.previousScene != None:
-                msg = {"message-id": next(self.id)}
-                msg["request-type"] = "SetCurrentScene"
-                msg["scene-name"] = self.obs.previousScene.name #type: ignore
-                msgs.append(msg)
+                self.switchScene(msgs, self.obs.previousScene.name) #type: ignore
 
         elif mtype == "showFilter":
-            msg = {"message-id": next(self.id)}
-            msg["request-type"] = "SetSourceFilterVisibility"
-            msg["sourceName"] = self.data["targetSource"]
-            msg["filterName"] = self.data["targetFilter"]
-            msg["filterEnabled"] = True
-            msgs.append(msg)
+            _filter = self.getFilter()
+            if not self.redundant(_filter, True):
+                msg = {"message-id": next(self.id)}
+                msg["request-type"] = "SetSourceFilterVisibility"
+                msg["sourceName"] = self.data["targetSource"]
+                msg["filterName"] = self.data["targetFilter"]
+                msg["filterEnabled"] = True
+                self.expect(msg, _filter, True)
+                msgs.append(msg)
 
         elif mtype == "hideFilter":
-            msg = {"message-id": next(self.id)}
-            msg["request-type"] = "SetSourceFilterVisibility"
-            msg["sourceName"] = self.data["targetSource"]
-            msg["filterName"] = self.data["targetFilter"]
-            msg["filterEnabled"] = False
-            msgs.append(msg)
+            _filter = self.getFilter()
+            if not self.redundant(_filter, False):
+                msg = {"message-id": next(self.id)}
+                msg["request-type"] = "SetSourceFilterVisibility"
+                msg["sourceName"] = self.data["targetSource"]
+                msg["filterName"] = self.data["targetFilter"]
+                msg["filterEnabled"] = False
+                self.expect(msg, _filter, False)
+                msgs.append(msg)
 
         elif mtype == "toggleFilter":
-            source = self.obs.getSource(self.data["targetSource"])
-            if source != None:
-                _filter = source.getFilter(self.data["targetFilter"]) #type: ignore
-                if _filter != None:
+            _filter = self.getFilter()
+            if _filter != None:
+                msg = {"message-id": next(self.id)}
+                msg["request-type"] = "SetSourceFilterVisibility"
+                msg["sourceName"] = self.data["targetSource"]
+                msg["filterName"] = self.data["targetFilter"]
+                msg["filterEnabled"] = not _filter.isVisible() #type: ignore
+                self.expect(msg, _filter, msg["filterEnabled"])
+                msgs.append(msg)
+
+        elif mtype == "showFilters" or mtype == "hideFilters" or mtype == "toggleFilters":
+            for source, _filter in self.data["selector"].filters(self.obs):
+                visible = mtype == "showFilters" or (mtype == "toggleFilters" and not _filter.isVisible())
+                if mtype == "toggleFilters" or not self.redundant(_filter, visible):
                     msg = {"message-id": next(self.id)}
                     msg["request-type"] = "SetSourceFilterVisibility"
-                    msg["sourceName"] = self.data["targetSource"]
-                    msg["filterName"] = self.data["targetFilter"]
-                    msg["filterEnabled"] = not _filter.isVisible() #type: ignore
+                    msg["sourceName"] = source.name
+                    msg["filterName"] = _filter.name
+                    msg["filterEnabled"] = visible
+                    self.expect(msg, _filter, visible)
                     msgs.append(msg)
 
         elif mtype == "editFilter":
@@ -116,15 +255,214 @@ class Request:
             msg["filterName"] = self.data["targetFilter"]
             value = self.data["data"]
             if self.data["targetSetting"] == "hue_shift":
-                value = (((value - 0) * (180 - -180)) / (127 - 0)) + -180
+                value = (((value - 0) * (180 - -180)) / (self.data.get("maximum", 127) - 0)) + -180
             msg["filterSettings"] = {self.data["targetSetting"]: value}
+            source = self.obs.getSource(self.data["targetSource"])
+            if source != None:
+                _filter = source.getFilter(self.data["targetFilter"]) #type: ignore
+                if _filter != None:
+                    _filter.settings[self.data["targetSetting"]] = value #type: ignore
+            msgs.append(msg)
+
+        elif mtype == "setFilterSetting":
+            source = self.obs.getSource(self.data["targetSource"])
+            if source != None:
+                _filter = source.getFilter(self.data["targetFilter"]) #type: ignore
+                if _filter != None:
+                    _filter.settings[self.data["targetSetting"]] = self.data["value"] #type: ignore
+            msg = {"message-id": next(self.id)}
+            msg["request-type"] = "SetSourceFilterSettings"
+            msg["sourceName"] = self.data["targetSource"]
+            msg["filterName"] = self.data["targetFilter"]
+            msg["filterSettings"] = {self.data["targetSetting"]: self.data["value"]}
+            msgs.append(msg)
+
+        elif mtype == "setVolume":
+            self.obs.getAudio(self.data["target"]).volume = self.data["volume"]
+            msg = {"message-id": next(self.id)}
+            msg["request-type"] = "SetVolume"
+            msg["source"] = self.data["target"]
+            msg["volume"] = self.data["volume"]
+            msgs.append(msg)
+
+        elif mtype == "mute" or mtype == "unmute":
+            audio = self.obs.getAudio(self.data["target"])
+            if audio.muted == (mtype == "mute") and not self.data.get("force", False):
+                self.obs.suppressed += 1
+            else:
+                audio.muted = mtype == "mute"
+                msg = {"message-id": next(self.id)}
+                msg["request-type"] = "SetMute"
+                msg["source"] = self.data["target"]
+                msg["mute"] = audio.muted
+                msgs.append(msg)
+
+        elif mtype == "toggleMute":
+            audio = self.obs.getAudio(self.data["target"])
+            if audio.muted != None:
+                audio.muted = not audio.muted
+            msg = {"message-id": next(self.id)}
+            msg["request-type"] = "ToggleMute"
+            msg["source"] = self.data["target"]
+            msgs.append(msg)
+
+        elif mtype == "playMedia" or mtype == "pauseMedia":
+            media = self.obs.getMedia(self.data["target"])
+            pause: bool = mtype == "pauseMedia"
+            if media.state != None and media.isPlaying() != pause and not self.data.get("force", False):
+                self.obs.suppressed += 1
+            else:
+                media.state = "paused" if pause else "playing"
+                msg = {"message-id": next(self.id)}
+                msg["request-type"] = "PlayPauseMedia"
+                msg["sourceName"] = self.data["target"]
+                msg["playPause"] = pause
+                msgs.append(msg)
+
+        elif mtype == "playPauseMedia":
+            media = self.obs.getMedia(self.data["target"])
+            msg = {"message-id": next(self.id)}
+            msg["request-type"] = "PlayPauseMedia"
+            msg["sourceName"] = self.data["target"]
+            #Without a known state OBS toggles it
+            if media.state != None:
+                msg["playPause"] = media.isPlaying()
+                media.state = "paused" if msg["playPause"] else "playing"
+            msgs.append(msg)
+
+        elif mtype == "restartMedia" or mtype == "stopMedia" or mtype == "nextMedia" or mtype == "previousMedia":
+            media = self.obs.getMedia(self.data["target"])
+            if mtype == "restartMedia":
+                media.state = "playing"
+            elif mtype == "stopMedia":
+                media.state = "stopped"
+            msg = {"message-id": next(self.id)}
+            msg["request-type"] = mtype[0].upper() + mtype[1:]
+            msg["sourceName"] = self.data["target"]
+            msgs.append(msg)
+
+        elif mtype == "scrubMedia":
+            if self.data["offset"] != 0:
+                msg = {"message-id": next(self.id)}
+                msg["request-type"] = "ScrubMedia"
+                msg["sourceName"] = self.data["target"]
+                msg["timeOffset"] = int(self.data["offset"])
+                msgs.append(msg)
+
+        elif mtype == "setMediaTime":
+            msg = {"message-id": next(self.id)}
+            msg["request-type"] = "SetMediaTime"
+            msg["sourceName"] = self.data["target"]
+            msg["timestamp"] = int(self.data["time"])
+            msgs.append(msg)
+
+        elif mtype == "previewScene":
+            if self.obs.studioMode == False:
+                print("Studio mode is not enabled.")
+            elif self.obs.previewScene != None and self.obs.previewScene.name == self.data["target"] and not self.data.get("force", False): #type: ignore
+                self.obs.suppressed += 1
+            else:
+                self.obs.setPreviewScene(self.data["target"])
+                msg = {"message-id": next(self.id)}
+                msg["request-type"] = "SetPreviewScene"
+                msg["scene-name"] = self.data["target"]
+                msgs.append(msg)
+
+        elif mtype == "transitionToProgram":
+            if self.obs.studioMode == False:
+                print("Studio mode is not enabled.")
+            else:
+                msg = {"message-id": next(self.id)}
+                msg["request-type"] = "TransitionToProgram"
+                if "transition" in self.data or "duration" in self.data:
+                    msg["with-transition"] = {}
+                    if "transition" in self.data:
+                        msg["with-transition"]["name"] = self.data["transition"]
+                    if "duration" in self.data:
+                        msg["with-transition"]["duration"] = self.data["duration"]
+                msgs.append(msg)
+                if self.obs.previewScene != None:
+                    self.obs.transition.begin(self.obs.previewScene.name, time.perf_counter(), self.data.get("duration")) #type: ignore
+
+        elif mtype == "setTBar":
+            if self.obs.studioMode != False:
+                msg = {"message-id": next(self.id)}
+                msg["request-type"] = "SetTBarPosition"
+                msg["position"] = self.data["position"]
+                msg["release"] = self.data["release"]
+                msgs.append(msg)
+
+        elif mtype == "enableStudioMode" or mtype == "disableStudioMode":
+            enable: bool = mtype == "enableStudioMode"
+            if self.obs.studioMode == enable and not self.data.get("force", False):
+                self.obs.suppressed += 1
+            else:
+                self.obs.studioMode = enable
+                msg = {"message-id": next(self.id)}
+                msg["request-type"] = "EnableStudioMode" if enable else "DisableStudioMode"
+                msgs.append(msg)
+
+        elif mtype == "toggleStudioMode":
+            if self.obs.studioMode != None:
+                self.obs.studioMode = not self.obs.studioMode
+            msg = {"message-id": next(self.id)}
+            msg["request-type"] = "ToggleStudioMode"
             msgs.append(msg)
 
+        elif mtype == "setTransform":
+            msg = {"message-id": next(self.id)}
+            msg["request-type"] = "SetSceneItemProperties"
+            msg["scene-name"] = self.data["scene"]
+            msg["item"] = self.data["target"]
+            for name, value in self.data["properties"].items():
+                group, field, _ = TRANSFORM[name]
+                if group == None:
+                    msg[field] = value
+                else:
+                    msg.setdefault(group, {})[field] = value
+            source = self.obs.getItem(self.data["scene"], self.data["target"])
+            if source != None:
+                source.expectTransform() #type: ignore
+                self.obs.expectations[msg["message-id"]] = (source.settleTransform, None) #type: ignore
+            msgs.append(msg)
+
+        elif mtype == "startStreaming" or mtype == "stopStreaming" or mtype == "toggleStreaming":
+            self.switch(msgs, self.obs.streaming, mtype, "Streaming")
+
+        elif mtype == "startRecording" or mtype == "stopRecording" or mtype == "toggleRecording":
+            self.switch(msgs, self.obs.recording, mtype, "Recording")
+
+        elif mtype == "startReplayBuffer" or mtype == "stopReplayBuffer" or mtype == "toggleReplayBuffer":
+            self.switch(msgs, self.obs.replayBuffer, mtype, "ReplayBuffer")
+
+        elif mtype == "pauseRecording" or mtype == "resumeRecording" or mtype == "togglePauseRecording":
+            recording: Output = self.obs.recording
+            if recording.state != None and not recording.isActive():
+                print("Recording is not active.")
+            else:
+                pause: bool = not recording.paused if mtype == "togglePauseRecording" else mtype == "pauseRecording"
+                if pause == recording.paused and mtype != "togglePauseRecording" and not self.data.get("force", False):
+                    self.obs.suppressed += 1
+                else:
+                    recording.paused = pause
+                    msg = {"message-id": next(self.id)}
+                    msg["request-type"] = "PauseRecording" if pause else "ResumeRecording"
+                    self.obs.expectations[msg["message-id"]] = (recording.settlePaused, pause)
+                    msgs.append(msg)
+
+        elif mtype == "saveReplayBuffer":
+            if self.obs.replayBuffer.state != None and not self.obs.replayBuffer.isActive():
+                print("Replay buffer is not active.")
+            else:
+                msg = {"message-id": next(self.id)}
+                msg["request-type"] = "SaveReplayBuffer"
+                msgs.append(msg)
+
         #General Requests
         elif mtype == "GetVersion":
             msg = {"message-id": next(self.id)}
             msg["request-type"] = mtype
-            #msgs.append(msg)
+            msgs.append(msg)
 
         elif mtype == "GetAuthRequired":
             msg = {"message-id": next(self.id)}
@@ -240,10 +578,10 @@ class Request:
             #msgs.append(msg)
 
         elif mtype == "GetMediaState":
-            #Unreleased
             msg = {"message-id": next(self.id)}
             msg["request-type"] = mtype
-            #msgs.append(msg)
+            msg["sourceName"] = self.data["target"]
+            msgs.append(msg)
 
         #Sources
         elif mtype == "GetMediaSourcesList":
@@ -265,7 +603,8 @@ class Request:
         elif mtype == "GetVolume":
             msg = {"message-id": next(self.id)}
             msg["request-type"] = mtype
-            #msgs.append(msg)
+            msg["source"] = self.data["target"]
+            msgs.append(msg)
 
         elif mtype == "SetVolume":
             msg = {"message-id": next(self.id)}
@@ -362,7 +701,9 @@ class Request:
         elif mtype == "GetSourceFilterInfo":
             msg = {"message-id": next(self.id)}
             msg["request-type"] = mtype
-            #msgs.append(msg)
+            msg["sourceName"] = self.data["targetSource"]
+            msg["filterName"] = self.data["targetFilter"]
+            msgs.append(msg)
 
         elif mtype == "AddFilterToSource":
             msg = {"message-id": next(self.id)}
@@ -448,10 +789,9 @@ class Request:
 
         #Recording
         elif mtype == "GetRecordingStatus":
-            #Unreleased
             msg = {"message-id": next(self.id)}
             msg["request-type"] = mtype
-            #msgs.append(msg)
+            msgs.append(msg)
 
         elif mtype == "StartStopRecording":
             msg = {"message-id": next(self.id)}
@@ -490,10 +830,9 @@ class Request:
 
         #Replay Buffer
         elif mtype == "GetReplayBufferStatus":
-            #Unreleased
             msg = {"message-id": next(self.id)}
             msg["request-type"] = mtype
-            #msgs.append(msg)
+            msgs.append(msg)
 
         elif mtype == "StartStopReplayBuffer":
             msg = {"message-id": next(self.id)}
@@ -541,7 +880,9 @@ class Request:
         elif mtype == "GetSceneItemProperties":
             msg = {"message-id": next(self.id)}
             msg["request-type"] = mtype
-            #msgs.append(msg)
+            msg["scene-name"] = self.data["scene"]
+            msg["item"] = self.data["target"]
+            msgs.append(msg)
 
         elif mtype == "SetSceneItemProperties":
             msg = {"message-id": next(self.id)}
@@ -634,7 +975,7 @@ class Request:
         elif mtype == "GetStreamingStatus":
             msg = {"message-id": next(self.id)}
             msg["request-type"] = mtype
-            #msgs.append(msg)
+            msgs.append(msg)
 
         elif mtype == "StartStopStreaming":
             msg = {"message-id": next(self.id)}
@@ -675,12 +1016,12 @@ class Request:
         elif mtype == "GetStudioModeStatus":
             msg = {"message-id": next(self.id)}
             msg["request-type"] = mtype
-            #msgs.append(msg)
+            msgs.append(msg)
 
         elif mtype == "GetPreviewScene":
             msg = {"message-id": next(self.id)}
             msg["request-type"] = mtype
-            #msgs.append(msg)
+            msgs.append(msg)
 
         elif mtype == "SetPreviewScene":
             msg = {"message-id": next(self.id)}
@@ -716,17 +1057,19 @@ class Request:
         elif mtype == "GetCurrentTransition":
             msg = {"message-id": next(self.id)}
             msg["request-type"] = mtype
-            #msgs.append(msg)
+            msgs.append(msg)
 
         elif mtype == "SetCurrentTransition":
             msg = {"message-id": next(self.id)}
             msg["request-type"] = mtype
-            #msgs.append(msg)
+            msg["transition-name"] = self.data["target"]
+            msgs.append(msg)
 
         elif mtype == "SetTransitionDuration":
             msg = {"message-id": next(self.id)}
             msg["request-type"] = mtype
-            #msgs.append(msg)
+            msg["duration"] = self.data["duration"]
+            msgs.append(msg)
 
         elif mtype == "GetTransitionDuration":
             msg = {"message-id": next(self.id)}
@@ -756,11 +1099,24 @@ class Response:
         """Updates the state of the OBS container according to the response."""
 
         if self.data.get("message-id") != None:
+            callback = self.obs.callbacks.pop(self.data["message-id"], None)
+            if callback != None:
+                callback(self.data)
+
+            expectation = self.obs.expectations.pop(self.data["message-id"], None)
+            if expectation != None:
+                settle, value = expectation #type: ignore
+                settle(value, self.data["status"] != "error")
+
             if self.data["status"] == "error":
+                self.obs.pendingResponses.pop(self.data["message-id"], None)
                 print(self.data["error"])
                 return
             else:
-                requestData = self.obs.pendingResponses.pop(self.data["message-id"])
+                requestData = self.obs.pendingResponses.pop(self.data["message-id"], None)
+                if requestData == None:
+                    print(f"Unexpected response {self.data['message-id']}.")
+                    return
                 request = requestData["request-type"]
                 #Requests as of version 4.8.0
 
@@ -783,10 +1139,12 @@ class Response:
                             "auth": response.decode("utf-8")})
 
                     else:
-                        self.obs.requests.append({"type": "GetSceneList"})
+                        self.obs.authenticated = True
+                        self.obs.synchronize()
 
                 elif request == "Authenticate":
-                    self.obs.requests.append({"type": "GetSceneList"})
+                    self.obs.authenticated = True
+                    self.obs.synchronize()
 
                 elif request == "SetHeartbeat":
                     #To be removed in 5.0.0
@@ -856,8 +1214,7 @@ class Response:
                     pass
 
                 elif request == "GetMediaState":
-                    #Unreleased
-                    pass
+                    self.obs.getMedia(requestData["sourceName"]).state = self.data["mediaState"]
 
                 #Sources
 
@@ -872,7 +1229,9 @@ class Response:
                     pass
 
                 elif request == "GetVolume":
-                    pass
+                    audio = self.obs.getAudio(self.data["name"])
+                    audio.volume = self.data["volume"]
+                    audio.muted = self.data["muted"]
 
                 elif request == "SetVolume":
                     pass
@@ -926,13 +1285,18 @@ class Response:
                     pass
 
                 elif request == "GetSourceFilters":
-                    source = self.obs.getSource(requestData["sourceName"])
+                    #Filters belong to the source, and every item of it in every scene shares their list
+                    source = self.obs.getFilters(requestData["sourceName"])
                     if source != None:
-                        for _filter in self.data["filters"]:
-                            source.addFilter(_filter) #type: ignore
+                        source.setFilters(self.data["filters"]) #type: ignore
+                        self.obs.filterStructure += 1
 
                 elif request == "GetSourceFilterInfo":
-                    pass
+                    source = self.obs.getFilters(requestData["sourceName"])
+                    if source != None:
+                        _filter = source.getFilter(requestData["filterName"]) #type: ignore
+                        if _filter != None:
+                            _filter.settings.update(self.data["settings"]) #type: ignore
 
                 elif request == "AddFilterToSource":
                     pass
@@ -986,8 +1350,8 @@ class Response:
 
                 #Recording
                 elif request == "GetRecordingStatus":
-                    #Unreleased
-                    pass
+                    self.obs.recording.setActive(self.data["isRecording"])
+                    self.obs.recording.paused = self.data.get("isRecordingPaused", False)
 
                 elif request == "StartStopRecording":
                     pass
@@ -1012,8 +1376,7 @@ class Response:
 
                 #Replay Buffer
                 elif request == "GetReplayBufferStatus":
-                    #Unreleased
-                    pass
+                    self.obs.replayBuffer.setActive(self.data["isReplayBufferActive"])
 
                 elif request == "StartStopReplayBuffer":
                     pass
@@ -1043,7 +1406,10 @@ class Response:
                     pass
 
                 elif request == "GetSceneItemProperties":
-                    pass
+                    source = self.obs.getItem(requestData["scene-name"], self.data["name"])
+                    if source != None:
+                        source.confirmVisible(self.data["visible"]) #type: ignore
+                        source.confirmTransform(self.data) #type: ignore
 
                 elif request == "SetSceneItemProperties":
                     pass
@@ -1081,9 +1447,7 @@ class Response:
                     self.obs.setCurrentScene(self.data["name"])
 
                 elif request == "GetSceneList":
-                    for scene in self.data["scenes"]:
-                        self.obs.addScene(scene)
-                    self.obs.setCurrentScene(self.data["current-scene"])
+                    self.obs.updateScenes(self.data["scenes"], self.data["current-scene"])
 
                 elif request == "CreateScene":
                     pass
@@ -1102,7 +1466,8 @@ class Response:
 
                 #Streaming
                 elif request == "GetStreamingStatus":
-                    pass
+                    self.obs.streaming.setActive(self.data["streaming"])
+                    self.obs.recording.setActive(self.data["recording"])
 
                 elif request == "StartStopStreaming":
                     pass
@@ -1127,10 +1492,14 @@ class Response:
 
                 #Studio Mode
                 elif request == "GetStudioModeStatus":
-                    pass
+                    self.obs.studioMode = self.data["studio-mode"]
+                    if self.obs.studioMode:
+                        self.obs.requests.append({"type": "GetPreviewScene"})
+                    else:
+                        self.obs.setPreviewScene(None)
 
                 elif request == "GetPreviewScene":
-                    pass
+                    self.obs.setPreviewScene(self.data["name"])
 
                 elif request == "SetPreviewScene":
                     pass
@@ -1152,7 +1521,8 @@ class Response:
                     pass
 
                 elif request == "GetCurrentTransition":
-                    pass
+                    self.obs.transition.name = self.data["name"]
+                    self.obs.transition.duration = self.data.get("duration", self.obs.transition.duration)
 
                 elif request == "SetCurrentTransition":
                     pass
@@ -1191,19 +1561,29 @@ class Response:
 
             #Transitions
             elif event == "SwitchTransition":
-                pass
+                self.obs.transition.name = self.data["transition-name"]
 
             elif event == "TransitionListChanged":
                 pass
 
             elif event == "TransitionDurationChanged":
-                pass
+                self.obs.transition.duration = self.data["new-duration"]
 
             elif event == "TransitionBegin":
-                pass
+                self.obs.transition.begin(self.data.get("to-scene"), time.perf_counter(), self.data.get("duration")) #type: ignore
 
             elif event == "TransitionEnd":
-                pass
+                transition = self.obs.transition
+                transition.end()
+                if transition.restore != None:
+                    name, duration = transition.restore #type: ignore
+                    transition.restore = None
+                    if name != None and name != transition.name:
+                        transition.name = name
+                        self.obs.requests.append({"type": "SetCurrentTransition", "target": name})
+                    if duration != transition.duration:
+                        transition.duration = duration
+                        self.obs.requests.append({"type": "SetTransitionDuration", "duration": duration})
 
             elif event == "TransitionVideoEnd":
                 pass
@@ -1217,51 +1597,55 @@ class Response:
 
             #Streaming
             elif event == "StreamStarting":
-                pass
+                self.obs.streaming.state = "starting"
 
             elif event == "StreamStarted":
-                pass
+                self.obs.streaming.state = "started"
 
             elif event == "StreamStopping":
-                pass
+                self.obs.streaming.state = "stopping"
 
             elif event == "StreamStopped":
-                pass
+                self.obs.streaming.state = "stopped"
 
             elif event == "StreamStatus":
-                pass
+                self.obs.streamHistory.record(time.perf_counter(), self.data)
+                self.obs.streaming.setActive(self.data["streaming"])
+                self.obs.recording.setActive(self.data["recording"])
+                self.obs.replayBuffer.setActive(self.data.get("replay-buffer-active", self.obs.replayBuffer.isActive()))
 
             #Recording
             elif event == "RecordingStarting":
-                pass
+                self.obs.recording.state = "starting"
 
             elif event == "RecordingStarted":
-                pass
+                self.obs.recording.state = "started"
 
             elif event == "RecordingStopping":
-                pass
+                self.obs.recording.state = "stopping"
 
             elif event == "RecordingStopped":
-                pass
+                self.obs.recording.state = "stopped"
+                self.obs.recording.paused = False
 
             elif event == "RecordingPaused":
-                pass
+                self.obs.recording.paused = True
 
             elif event == "RecordingResumed":
-                pass
+                self.obs.recording.paused = False
 
             #Replay Buffer
             elif event == "ReplayStarting":
-                pass
+                self.obs.replayBuffer.state = "starting"
 
             elif event == "ReplayStarted":
-                pass
+                self.obs.replayBuffer.state = "started"
 
             elif event == "ReplayStopping":
-                pass
+                self.obs.replayBuffer.state = "stopping"
 
             elif event == "ReplayStopped":
-                pass
+                self.obs.replayBuffer.state = "stopped"
 
             #Other
             elif event == "Exiting":
@@ -1282,10 +1666,10 @@ class Response:
                 pass
 
             elif event == "SourceVolumeChanged":
-                pass
+                self.obs.getAudio(self.data["sourceName"]).volume = self.data["volume"]
 
             elif event == "SourceMuteStateChanged":
-                pass
+                self.obs.getAudio(self.data["sourceName"]).muted = self.data["muted"]
 
             elif event == "SourceAudioDeactivated":
                 #Unreleased
@@ -1305,37 +1689,43 @@ class Response:
                 pass
 
             elif event == "SourceFilterAdded":
-                pass
+                source = self.obs.getFilters(self.data["sourceName"])
+                if source != None:
+                    source.addFilter({ #type: ignore
+                        "name": self.data["filterName"],
+                        "type": self.data["filterType"],
+                        "settings": self.data["filterSettings"],
+                        "enabled": True})
+                    self.obs.filterStructure += 1
 
             elif event == "SourceFilterRemoved":
-                pass
+                source = self.obs.getFilters(self.data["sourceName"])
+                if source != None:
+                    source.removeFilter(self.data["filterName"]) #type: ignore
+                    self.obs.filterStructure += 1
 
             elif event == "SourceFilterVisibilityChanged":
-                source = self.obs.getSource(self.data["sourceName"])
+                source = self.obs.getFilters(self.data["sourceName"])
                 if source != None:
                     _filter = source.getFilter(self.data["filterName"]) #type: ignore
                     if _filter != None:
-                        _filter.setVisible(self.data["filterEnabled"]) #type: ignore
+                        _filter.confirmVisible(self.data["filterEnabled"]) #type: ignore
 
             elif event == "SourceFiltersReordered":
                 pass
 
             #Media
             elif event == "MediaPlaying":
-                #Unreleased
-                pass
+                self.obs.getMedia(self.data["sourceName"]).state = "playing"
 
             elif event == "MediaPaused":
-                #Unreleased
-                pass
+                self.obs.getMedia(self.data["sourceName"]).state = "paused"
 
             elif event == "MediaRestarted":
-                #Unreleased
-                pass
+                self.obs.getMedia(self.data["sourceName"]).state = "playing"
 
             elif event == "MediaStopped":
-                #Unreleased
-                pass
+                self.obs.getMedia(self.data["sourceName"]).state = "stopped"
 
             elif event == "MediaNext":
                 #Unreleased
@@ -1346,36 +1736,40 @@ class Response:
                 pass
 
             elif event == "MediaStarted":
-                #Unreleased
-                pass
+                self.obs.getMedia(self.data["sourceName"]).state = "playing"
 
             elif event == "MediaEnded":
-                #Unreleased
-                pass
+                self.obs.getMedia(self.data["sourceName"]).state = "ended"
 
             #Scene Items
             elif event == "SceneItemOrderChanged":
                 pass
 
             elif event == "SceneItemAdded":
-                pass
+                #The event only names the item, so its visibility is asked for
+                if self.obs.addItem(self.data["scene-name"], self.data["item-name"]) != None:
+                    self.obs.requests.append({
+                        "type": "GetSceneItemProperties",
+                        "scene": self.data["scene-name"],
+                        "target": self.data["item-name"],
+                        })
 
             elif event == "SceneItemRemoved":
-                pass
+                self.obs.removeItem(self.data["scene-name"], self.data["item-name"])
 
             elif event == "SceneItemVisibilityChanged":
-                scene = self.obs.getScene(self.data["scene-name"])
-                if scene != None:
-                    source = scene.getSource(self.data["item-name"]) #type: ignore
-                    if source != None:
-                        source.setVisible(self.data["item-visible"]) #type: ignore
+                source = self.obs.getItem(self.data["scene-name"], self.data["item-name"])
+                if source != None:
+                    source.confirmVisible(self.data["item-visible"]) #type: ignore
                         
 
             elif event == "SceneItemLockChanged":
                 pass
 
             elif event == "SceneItemTransformChanged":
-                pass
+                source = self.obs.getItem(self.data["scene-name"], self.data["item-name"])
+                if source != None:
+                    source.confirmTransform(self.data["transform"]) #type: ignore
 
             elif event == "SceneItemSelected":
                 pass
@@ -1385,10 +1779,14 @@ class Response:
 
             #Studio Mode
             elif event == "PreviewSceneChanged":
-                pass
+                self.obs.setPreviewScene(self.data["scene-name"])
 
             elif event == "StudioModeSwitched":
-                pass
+                self.obs.studioMode = self.data["new-state"]
+                if self.obs.studioMode:
+                    self.obs.requests.append({"type": "GetPreviewScene"})
+                else:
+                    self.obs.setPreviewScene(None)
 
             #Unhandled Events
             else:
@@ -0,0 +1,161 @@
+from __future__ import annotations #for python3.8 or less
+
+import asyncio
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Callable
+
+TRIGGERS: tuple = ("note_on", "note_off", "control_change", "control_change_14", "nrpn", "rpn", "pitchwheel")
+LATENCY_BUCKETS: tuple = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class Histogram:
+    """Fixed bucket histogram with preallocated counts."""
+
+    def __init__(self, bounds: tuple) -> None:
+        """Initializes a histogram with upper bucket bounds in ascending order."""
+
+        self.bounds: tuple = bounds
+        self.counts: array = array("Q", [0] * (len(bounds) + 1))
+        self.sum: float = 0.0
+
+    def observe(self, value: float) -> None:
+        """Counts a value in its bucket."""
+
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def render(self, name: str, labels: str = "") -> list[str]: #type: ignore
+        """Returns the cumulative Prometheus exposition lines of the histogram."""
+
+        lines: list[str] = [] #type: ignore
+        prefix: str = labels + "," if labels else ""
+        labelset: str = "{" + labels + "}" if labels else ""
+        total: int = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {total}')
+        total += self.counts[-1]
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {total}')
+        lines.append(f"{name}_sum{labelset} {self.sum}")
+        lines.append(f"{name}_count{labelset} {total}")
+        return lines
+
+class Metrics:
+    """Counters, gauges and histograms of the handler, exposed in the Prometheus text format.
+
+    Counters live in preallocated arrays indexed by precomputed slots, so updating them from
+    the hot path does not grow any container."""
+
+    def __init__(self) -> None:
+        """Initializes every metric at zero."""
+
+        self.triggers: dict[str, int] = {trigger: i for i, trigger in enumerate(TRIGGERS)} #type: ignore
+        self.events: array = array("Q", [0] * len(TRIGGERS))
+
+        #Request type slots are assigned the first time a type is sent
+        self.requestTypes: dict[str, int] = {} #type: ignore
+        self.requests: array = array("Q", [0] * 256)
+
+        self.connects: int = 0
+        self.reconnects: int = 0
+
+        self.sent: dict[str, float] = {} #type: ignore
+        self.latency: Histogram = Histogram(LATENCY_BUCKETS)
+        self.frames: Histogram = Histogram(LATENCY_BUCKETS)
+
+        self.gauges: dict[str, tuple[str, str, Callable[[], float]]] = {} #type: ignore
+
+    def gauge(self, name: str, description: str, read: Callable[[], float], kind: str = "gauge") -> None:
+        """Registers a gauge, or a counter kept elsewhere, whose value is read when the metrics are scraped."""
+
+        self.gauges[name] = (kind, description, read)
+
+    def event(self, trigger: str) -> None:
+        """Counts a MIDI message of the trigger type."""
+
+        slot = self.triggers.get(trigger)
+        if slot != None:
+            self.events[slot] += 1 #type: ignore
+
+    def request(self, msg: dict, now: float) -> None:
+        """Counts a message sent to OBS and starts timing its round trip."""
+
+        slot = self.requestTypes.get(msg["request-type"])
+        if slot == None:
+            slot = len(self.requestTypes)
+            if slot >= len(self.requests):
+                return
+            self.requestTypes[msg["request-type"]] = slot
+        self.requests[slot] += 1 #type: ignore
+        self.sent[msg["message-id"]] = now
+
+    def response(self, data: dict, now: float) -> None:
+        """Records the round trip latency of a reply from OBS."""
+
+        sent = self.sent.pop(data["message-id"], None)
+        if sent != None:
+            self.latency.observe(now - sent) #type: ignore
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+
+        lines: list[str] = [] #type: ignore
+
+        lines.append("# HELP midi_events_total MIDI messages received, by trigger type.")
+        lines.append("# TYPE midi_events_total counter")
+        for trigger, slot in self.triggers.items():
+            lines.append(f'midi_events_total{{trigger="{trigger}"}} {self.events[slot]}')
+
+        lines.append("# HELP obs_requests_total Messages sent to OBS, by request type.")
+        lines.append("# TYPE obs_requests_total counter")
+        for requestType, slot in self.requestTypes.items():
+            lines.append(f'obs_requests_total{{type="{requestType}"}} {self.requests[slot]}')
+
+        lines.append("# HELP obs_connects_total Websocket connections opened to OBS.")
+        lines.append("# TYPE obs_connects_total counter")
+        lines.append(f"obs_connects_total {self.connects}")
+        lines.append("# HELP obs_reconnects_total Websocket connections reopened after losing OBS.")
+        lines.append("# TYPE obs_reconnects_total counter")
+        lines.append(f"obs_reconnects_total {self.reconnects}")
+
+        for name, (kind, description, read) in self.gauges.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {read()}")
+
+        lines.append("# HELP obs_request_latency_seconds Round trip time from sending a request to its reply.")
+        lines.append("# TYPE obs_request_latency_seconds histogram")
+        lines.extend(self.latency.render("obs_request_latency_seconds"))
+        lines.append("# HELP frame_duration_seconds Time spent handling a frame of the handler loop.")
+        lines.append("# TYPE frame_duration_seconds histogram")
+        lines.extend(self.frames.render("frame_duration_seconds"))
+
+        return "\n".join(lines) + "\n"
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answers a single HTTP request with the metrics."""
+
+        try:
+            while True:
+                line: bytes = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            body: bytes = self.render().encode("utf-8")
+            writer.write(b"HTTP/1.1 200 OK\r\n"
+                         b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                         b"Content-Length: " + str(len(body)).encode("ascii") + b"\r\n"
+                         b"Connection: close\r\n\r\n" + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, address: str) -> asyncio.AbstractServer:
+        """Starts serving the metrics on host:port, or on a Unix socket given as unix:path."""
+
+        if address.startswith("unix:"):
+            return await asyncio.start_unix_server(self.handle, address[len("unix:"):])
+        host, port = address.rsplit(":", 1)
+        return await asyncio.start_server(self.handle, host, int(port))
@@ -0,0 +1,90 @@
+from __future__ import annotations #for python3.8 or less
+
+import cProfile, os, sys, threading, time
+
+from collections import Counter
+from typing import Optional
+
+class Profiler:
+    """Runtime switchable profiler writing one output file per profiling window.
+
+    The sample mode walks the stack of the profiled thread from a background thread at a fixed
+    interval and writes collapsed stacks, which keeps the overhead on the event loop low. The
+    cprofile mode instruments every call and writes pstats instead."""
+
+    def __init__(self, directory: str = "profiles", interval: float = 0.005) -> None:
+        """Initializes the profiler to write into directory, sampling every interval seconds."""
+
+        self.directory: str = directory
+        self.interval: float = interval
+
+        self.mode: str = ""
+        self.target: int = 0
+        self.samples: Counter = Counter()
+        self.thread: Optional[threading.Thread] = None
+        self.stopping: threading.Event = threading.Event()
+        self.profile: Optional[cProfile.Profile] = None
+
+    @property
+    def running(self) -> bool:
+        """Returns if a profiling window is open."""
+
+        return self.mode != ""
+
+    def start(self, mode: str = "sample") -> None:
+        """Opens a profiling window on the calling thread."""
+
+        if self.running:
+            return
+
+        if mode == "sample":
+            self.target = threading.get_ident()
+            self.samples = Counter()
+            self.stopping.clear()
+            self.thread = threading.Thread(target = self.sample, name = "profiler", daemon = True)
+            self.thread.start()
+        elif mode == "cprofile":
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        else:
+            raise RuntimeError(f"Unknown profiling mode {mode}.")
+
+        self.mode = mode
+
+    def stop(self) -> str:
+        """Closes the profiling window and returns the path of the written output."""
+
+        if not self.running:
+            return ""
+
+        os.makedirs(self.directory, exist_ok = True)
+        stamp: str = time.strftime("%Y%m%d-%H%M%S")
+
+        if self.mode == "sample":
+            self.stopping.set()
+            self.thread.join() #type: ignore
+            path: str = os.path.join(self.directory, f"profile-{stamp}.collapsed")
+            with open(path, "w") as file:
+                for stack, count in self.samples.most_common():
+                    file.write(f"{stack} {count}\n")
+        else:
+            self.profile.disable() #type: ignore
+            path = os.path.join(self.directory, f"profile-{stamp}.pstats")
+            self.profile.dump_stats(path) #type: ignore
+            self.profile = None
+
+        self.mode = ""
+        return path
+
+    def sample(self) -> None:
+        """Records the stack of the target thread until the window is closed."""
+
+        while not self.stopping.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            stack: list[str] = [] #type: ignore
+            while frame != None:
+                code = frame.f_code #type: ignore
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back #type: ignore
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
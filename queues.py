@@ -0,0 +1,229 @@
+from __future__ import annotations #for python3.8 or less
+
+import time
+
+from collections import deque
+from typing import Optional
+
+from messages import Request
+
+POLICIES: tuple = ("keep", "latest", "drop")
+OFFLINE: tuple = ("drop", "latest", "queue")
+
+#Priority classes in the order they are served, with their share of each scheduling round
+PRIORITIES: dict[str, int] = {"control": 0, "transition": 1, "visibility": 2, "settings": 3, "query": 4} #type: ignore
+WEIGHTS: tuple = (64, 16, 8, 4, 1)
+
+CLASSES: dict[str, str] = { #type: ignore
+    "GetAuthRequired": "control",
+    "Authenticate": "control",
+    "transitionToScene": "transition",
+    "transitionToPreviousScene": "transition",
+    "SetCurrentTransition": "transition",
+    "SetTransitionDuration": "transition",
+    "previewScene": "transition",
+    "transitionToProgram": "transition",
+    "setTBar": "transition",
+    "showSource": "visibility",
+    "hideSource": "visibility",
+    "toggleSource": "visibility",
+    "showAllSources": "visibility",
+    "hideAllSources": "visibility",
+    "showSources": "visibility",
+    "hideSources": "visibility",
+    "toggleSources": "visibility",
+    "showFilter": "visibility",
+    "hideFilter": "visibility",
+    "toggleFilter": "visibility",
+    "showFilters": "visibility",
+    "hideFilters": "visibility",
+    "toggleFilters": "visibility",
+    "mute": "visibility",
+    "unmute": "visibility",
+    "toggleMute": "visibility",
+    "playMedia": "visibility",
+    "pauseMedia": "visibility",
+    "playPauseMedia": "visibility",
+    "restartMedia": "visibility",
+    "stopMedia": "visibility",
+    "nextMedia": "visibility",
+    "previousMedia": "visibility",
+    "startStreaming": "transition",
+    "stopStreaming": "transition",
+    "toggleStreaming": "transition",
+    "startRecording": "transition",
+    "stopRecording": "transition",
+    "toggleRecording": "transition",
+    "pauseRecording": "transition",
+    "resumeRecording": "transition",
+    "togglePauseRecording": "transition",
+    "startReplayBuffer": "transition",
+    "stopReplayBuffer": "transition",
+    "toggleReplayBuffer": "transition",
+    "saveReplayBuffer": "transition",
+    }
+
+def classify(data: dict) -> int:
+    """Returns the priority class of request data, from its priority override or its type."""
+
+    if "priority" in data:
+        return PRIORITIES[data["priority"]]
+    mtype: str = data["type"]
+    if mtype in CLASSES:
+        return PRIORITIES[CLASSES[mtype]]
+    if mtype.startswith("Get"):
+        return PRIORITIES["query"]
+    return PRIORITIES["settings"]
+
+class RequestQueue:
+    """Bounded priority queue of requests between MIDI intake and the websocket sender.
+
+    Each request has an overflow policy: keep requests are never dropped, latest requests
+    replace the queued request with the same key in place, and when the queue is full the
+    oldest request that is not keep is dropped from the lowest class to make room.
+
+    Classes are served by weighted round robin, so higher classes go first without starving
+    the lower ones.
+
+    While OBS is disconnected, requests follow their offline policy instead: drop requests are
+    discarded, latest requests only keep their latest value, and queue requests are kept until
+    their time to live runs out."""
+
+    def __init__(self, capacity: int = 256) -> None:
+        """Initializes an empty queue holding up to capacity droppable requests."""
+
+        self.capacity: int = capacity
+        self.classes: list[deque[Request]] = [deque() for _ in WEIGHTS] #type: ignore
+        self.credits: list[int] = list(WEIGHTS) #type: ignore
+        self.size: int = 0
+        self.latest: dict = {}
+
+        self.online: bool = False
+
+        self.dropped: int = 0
+        self.replaced: int = 0
+        self.discarded: int = 0
+        self.expired: int = 0
+        self.highWater: int = 0
+
+    def __len__(self) -> int:
+        """Returns the number of queued requests."""
+
+        return self.size
+
+    def push(self, request: Request) -> None:
+        """Queues a request according to its overflow policy and priority class."""
+
+        if not self.online:
+            if request.offline == "drop":
+                self.discarded += 1
+                self.cancel(request)
+                return
+            elif request.offline == "latest":
+                request.policy = "latest"
+            elif request.expires == 0.0:
+                request.expires = time.perf_counter() + request.ttl
+
+        if request.policy == "latest":
+            queued: Optional[Request] = self.latest.get(request.key)
+            if queued != None:
+                #Relative changes add up and partial updates merge, instead of replacing each other
+                field: Optional[str] = request.data.get("accumulate")
+                if field != None:
+                    request.data[field] += queued.data[field] #type: ignore
+                field = request.data.get("merge")
+                if field != None:
+                    merged: dict = queued.data[field].copy() #type: ignore
+                    merged.update(request.data[field]) #type: ignore
+                    request.data[field] = merged #type: ignore
+                queued.data = request.data #type: ignore
+                self.cancel(queued) #type: ignore
+                queued.callback = request.callback #type: ignore
+                self.replaced += 1
+                return
+
+        if self.size >= self.capacity and not self.evict() and request.policy != "keep":
+            self.dropped += 1
+            self.cancel(request)
+            return
+
+        if request.priority == None:
+            request.priority = classify(request.data)
+        self.classes[request.priority].append(request) #type: ignore
+        self.size += 1
+        if request.policy == "latest":
+            self.latest[request.key] = request
+        if self.size > self.highWater:
+            self.highWater = self.size
+
+    def evict(self) -> bool:
+        """Drops the oldest request that may be dropped, returning if there was one."""
+
+        for entries in reversed(self.classes):
+            for request in entries:
+                if request.policy != "keep":
+                    entries.remove(request)
+                    self.size -= 1
+                    self.forget(request)
+                    self.dropped += 1
+                    self.cancel(request)
+                    return True
+        return False
+
+    def cancel(self, request: Request) -> None:
+        """Tells the callback of a request that will never be sent that no messages went out for it."""
+
+        if request.callback != None:
+            request.callback([]) #type: ignore
+
+    def forget(self, request: Request) -> None:
+        """Removes a request from the latest-wins index."""
+
+        if request.policy == "latest" and self.latest.get(request.key) is request:
+            del self.latest[request.key]
+
+    def connect(self) -> None:
+        """Lets requests through again."""
+
+        self.online = True
+
+    def disconnect(self) -> None:
+        """Applies the offline policies to every queued request."""
+
+        self.online = False
+        queued: list[Request] = [request for entries in self.classes for request in entries] #type: ignore
+        for entries in self.classes:
+            entries.clear()
+        self.latest.clear()
+        self.size = 0
+        for request in queued:
+            self.push(request)
+
+    def pop(self, classes: int = len(WEIGHTS)) -> Optional[Request]:
+        """Removes and returns the next request from the first classes, by class credit and then arrival.
+
+        Requests whose time to live ran out while disconnected are skipped."""
+
+        now: float = time.perf_counter()
+        while True:
+            request: Optional[Request] = self.next(classes)
+            if request == None or request.expires == 0.0 or now <= request.expires: #type: ignore
+                return request
+            self.expired += 1
+            self.cancel(request) #type: ignore
+
+    def next(self, classes: int) -> Optional[Request]:
+        """Removes and returns the next request from the first classes, if any are queued."""
+
+        for _ in range(2):
+            for priority in range(classes):
+                entries: deque[Request] = self.classes[priority] #type: ignore
+                if entries and self.credits[priority] > 0:
+                    self.credits[priority] -= 1
+                    request: Request = entries.popleft()
+                    self.size -= 1
+                    self.forget(request)
+                    return request
+            #Every waiting class spent its share of the round
+            self.credits = list(WEIGHTS)
+        return None
@@ -0,0 +1,143 @@
+from __future__ import annotations #for python3.8 or less
+
+import struct, time
+
+from collections import deque
+from collections.abc import Callable, Generator
+from typing import Any, BinaryIO, Optional
+
+MAGIC: bytes = b"MOWR"
+VERSION: int = 2
+
+#Nanoseconds since the start of the recording, and the length of the message bytes, by version
+RECORDS: dict[int, struct.Struct] = { #type: ignore
+    1: struct.Struct("<QB"),
+    2: struct.Struct("<QI"),
+    }
+RECORD: struct.Struct = RECORDS[VERSION]
+
+class Recorder:
+    """Writes MIDI messages with high resolution timestamps to a compact binary file."""
+
+    def __init__(self, path: str) -> None:
+        """Initializes a recording at path, starting its clock now."""
+
+        self.file: BinaryIO = open(path, "wb")
+        self.file.write(MAGIC + bytes([VERSION]))
+        self.start: int = time.perf_counter_ns()
+        self.count: int = 0
+
+    def record(self, data: list[int], arrival: Optional[int] = None) -> None: #type: ignore
+        """Appends the bytes of a MIDI message, stamped with its arrival in perf_counter_ns time, or the current time."""
+
+        if arrival == None:
+            arrival = time.perf_counter_ns()
+        self.file.write(RECORD.pack(arrival - self.start, len(data))) #type: ignore
+        self.file.write(bytes(data))
+        self.count += 1
+
+    def close(self) -> None:
+        """Flushes and closes the recording."""
+
+        self.file.close()
+
+def read(path: str) -> Generator[tuple[int, bytes], None, None]: #type: ignore
+    """Yields the timestamp in nanoseconds and bytes of every message in a recording."""
+
+    with open(path, "rb") as file:
+        header: bytes = file.read(len(MAGIC) + 1)
+        if len(header) <= len(MAGIC) or header[:len(MAGIC)] != MAGIC or header[len(MAGIC)] not in RECORDS:
+            raise RuntimeError(f"{path} is not a supported recording.")
+        record: struct.Struct = RECORDS[header[len(MAGIC)]]
+
+        while True:
+            head: bytes = file.read(record.size)
+            if len(head) < record.size:
+                return
+            timestamp, length = record.unpack(head)
+            yield timestamp, file.read(length)
+
+class StampedInput:
+    """Wraps a MIDI input port, stamping each message with its arrival time.
+
+    The port hands messages to a callback on its own thread as they arrive, so recordings keep
+    their real timing instead of the frame they were parsed in."""
+
+    def __init__(self, name: str, opener: Callable[..., Any]) -> None:
+        """Opens the port called name with opener, which takes the name and a callback."""
+
+        self.pending: deque[tuple[int, Any]] = deque() #type: ignore
+        self.arrival: Optional[int] = None
+        self.port: Any = opener(name, callback = self.receive)
+
+    def __enter__(self) -> StampedInput:
+        """Returns the wrapper, for use in place of an opened port."""
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Closes the port."""
+
+        self.port.close()
+
+    def receive(self, message: Any) -> None:
+        """Queues a message with its arrival time, called from the thread of the port."""
+
+        self.pending.append((time.perf_counter_ns(), message))
+
+    def iter_pending(self) -> Generator[Any, None, None]:
+        """Yields the messages that arrived, setting arrival to the time of each one."""
+
+        while self.pending:
+            self.arrival, message = self.pending.popleft()
+            yield message
+
+class Replayer:
+    """Stands in for a MIDI input port, releasing recorded messages at their recorded times.
+
+    A speed of 2 plays twice as fast, and a speed of 0 releases every message at once."""
+
+    def __init__(self, path: str, speed: float, message: Callable[[bytes], Any]) -> None:
+        """Initializes a replay of the recording at path, creating messages from bytes with message."""
+
+        self.records: list[tuple[int, bytes]] = list(read(path)) #type: ignore
+        self.speed: float = speed
+        self.message: Callable[[bytes], Any] = message
+        self.index: int = 0
+        self.start: Optional[int] = None
+        self.arrival: Optional[int] = None
+
+        #Leading silence before the first message is skipped
+        self.offset: int = self.records[0][0] if self.records else 0
+
+    def __enter__(self) -> Replayer:
+        """Returns the replayer, for use in place of an opened port."""
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Nothing to release."""
+
+        pass
+
+    @property
+    def finished(self) -> bool:
+        """Returns if every message has been released."""
+
+        return self.index >= len(self.records)
+
+    def iter_pending(self) -> Generator[Any, None, None]:
+        """Yields the messages that are due, starting the replay clock on the first call."""
+
+        now: int = time.perf_counter_ns()
+        if self.start == None:
+            self.start = now
+
+        while self.index < len(self.records):
+            timestamp, data = self.records[self.index]
+            if self.speed > 0 and timestamp - self.offset > (now - self.start) * self.speed: #type: ignore
+                return
+            self.index += 1
+            #Stamped with the time the message was due, as if it arrived then
+            self.arrival = self.start + int((timestamp - self.offset) / self.speed) if self.speed > 0 else now #type: ignore
+            yield self.message(data)
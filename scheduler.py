@@ -0,0 +1,53 @@
+from __future__ import annotations #for python3.8 or less
+
+import heapq
+
+from collections.abc import Callable
+
+class Timer:
+    """Callback scheduled to run once at a point in time."""
+
+    def __init__(self, when: float, order: int, callback: Callable[[float], None]) -> None:
+        """Initializes a timer for callback at when."""
+
+        self.when: float = when
+        self.order: int = order
+        self.callback: Callable[[float], None] = callback
+        self.cancelled: bool = False
+
+    def __lt__(self, other: Timer) -> bool:
+        """Orders timers by deadline, then by the order they were scheduled in."""
+
+        if self.when == other.when:
+            return self.order < other.order
+        return self.when < other.when
+
+    def cancel(self) -> None:
+        """Prevents the timer from running."""
+
+        self.cancelled = True
+
+class Scheduler:
+    """Heap of timers that is run from the handler's frame loop instead of sleeping tasks."""
+
+    def __init__(self) -> None:
+        """Initializes an empty scheduler."""
+
+        self.timers: list[Timer] = [] #type: ignore
+        self.order: int = 0
+
+    def callAt(self, when: float, callback: Callable[[float], None]) -> Timer:
+        """Schedules callback to be called with the current time once when has passed."""
+
+        timer: Timer = Timer(when, self.order, callback)
+        self.order += 1
+        heapq.heappush(self.timers, timer)
+        return timer
+
+    def runDue(self, now: float) -> None:
+        """Runs every timer whose deadline is at or before now."""
+
+        while self.timers and self.timers[0].when <= now:
+            timer: Timer = heapq.heappop(self.timers)
+            if not timer.cancelled:
+                timer.callback(now)
@@ -0,0 +1,98 @@
+from __future__ import annotations #for python3.8 or less
+
+import time
+
+from collections.abc import Callable
+from typing import Optional
+
+from scheduler import Scheduler, Timer
+from structures import OBS
+
+class Sequence:
+    """Running instance of a timed series of commands."""
+
+    def __init__(self, steps: list[dict], data: int, maximum: int, dispatch: Callable, scheduler: Scheduler, obs: OBS) -> None: #type: ignore
+        """Initializes a sequence of steps, run with the data of the trigger that started it."""
+
+        self.steps: list[dict] = steps #type: ignore
+        self.data: int = data
+        self.maximum: int = maximum
+        self.dispatch: Callable = dispatch
+        self.scheduler: Scheduler = scheduler
+        self.obs: OBS = obs
+
+        self.index: int = 0
+        self.timer: Optional[Timer] = None
+        self.awaiting: bool = False
+        self.dispatching: bool = False
+        self.pending: set[str] = set() #type: ignore
+        self.cancelled: bool = False
+        self.done: bool = False
+
+    def advance(self, now: float) -> None:
+        """Runs steps until the next delay or acknowledgement, or the end of the sequence."""
+
+        self.timer = None
+        self.awaiting = False
+        self.pending.clear()
+        while not self.cancelled and self.index < len(self.steps):
+            step: dict = self.steps[self.index]
+            self.index += 1
+
+            if "wait" in step:
+                self.timer = self.scheduler.callAt(now + step["wait"] / 1000, self.advance)
+                return
+
+            if step.get("await", False):
+                self.awaiting = True
+                self.dispatching = True
+                self.dispatch(step, self.data, self.maximum, self.sent)
+                self.dispatching = False
+                if self.awaiting:
+                    if "timeout" in step:
+                        self.timer = self.scheduler.callAt(now + step["timeout"] / 1000, self.advance)
+                    return
+            else:
+                self.dispatch(step, self.data, self.maximum)
+
+        self.done = True
+
+    def sent(self, msgs: list[dict]) -> None: #type: ignore
+        """Registers for the acknowledgements of the messages sent for an awaited step."""
+
+        if self.cancelled or not self.awaiting:
+            return
+
+        for msg in msgs:
+            self.pending.add(msg["message-id"])
+            self.obs.callbacks[msg["message-id"]] = self.acknowledge
+        if not self.pending:
+            self.resume()
+
+    def acknowledge(self, data: dict) -> None:
+        """Counts an acknowledgement from OBS and resumes once all of them arrived."""
+
+        if self.cancelled or data["message-id"] not in self.pending:
+            return
+
+        self.pending.discard(data["message-id"])
+        if not self.pending:
+            self.resume()
+
+    def resume(self) -> None:
+        """Continues past an awaited step."""
+
+        self.awaiting = False
+        if self.dispatching:
+            #Nothing was sent for the step, so the loop in advance carries on
+            return
+        if self.timer != None:
+            self.timer.cancel() #type: ignore
+        self.advance(time.perf_counter())
+
+    def cancel(self) -> None:
+        """Stops the sequence before its remaining steps run."""
+
+        self.cancelled = True
+        if self.timer != None:
+            self.timer.cancel() #type: ignore
@@ -1,35 +1,213 @@
 from __future__ import annotations #for python3.8 or less
 
+import sys, array
+
+from collections.abc import Iterable, Iterator
 from typing import Optional
 
+SNAPSHOT_VERSION: int = 1
+
+#Seconds a transition is considered running past its duration, in case its end event is lost
+TRANSITION_MARGIN: float = 0.5
+
+#Properties of a scene item transform, with where they are found in the transforms of OBS and their default values
+TRANSFORM: dict[str, tuple[Optional[str], str, float]] = { #type: ignore
+    "x": ("position", "x", 0.0),
+    "y": ("position", "y", 0.0),
+    "scaleX": ("scale", "x", 1.0),
+    "scaleY": ("scale", "y", 1.0),
+    "rotation": (None, "rotation", 0.0),
+    "cropTop": ("crop", "top", 0.0),
+    "cropRight": ("crop", "right", 0.0),
+    "cropBottom": ("crop", "bottom", 0.0),
+    "cropLeft": ("crop", "left", 0.0),
+    }
+
+#Fields of StreamStatus events kept in the history
+STREAM_FIELDS: tuple = ("kbits-per-sec", "fps", "strain", "num-dropped-frames", "num-total-frames")
+
+def intern(name: Optional[str]) -> Optional[str]:
+    """Interns a name that may be missing, so repeated names share a single string."""
+
+    if name == None:
+        return None
+    return sys.intern(name) #type: ignore
+
 class OBS:
     """Data container for information pertaining to the current state of OBS."""
 
+    __slots__ = ("password", "authenticated", "scenes", "index", "sources", "currentScene", "previousScene", "previewScene", "studioMode",
+                 "requests", "pendingResponses", "callbacks", "expectations", "suppressed", "structure",
+                 "filterStructure", "items", "itemsStructure", "itemsScene", "itemsOrder", "audio", "media",
+                 "streaming", "recording", "replayBuffer", "streamHistory", "transition")
+
     def __init__(self, password: Optional[str] = None) -> None:
         """Initializes the OBS container"""
 
         self.password: Optional[str] = password
+        self.authenticated: bool = False
 
         self.scenes: list[Scene] = [] #type: ignore
+        self.index: dict[str, Scene] = {} #type: ignore
+
+        #First item of every source by name, whose filter list every other item of the source shares
+        self.sources: dict[str, Source] = {} #type: ignore
 
         self.currentScene: Optional[Scene] = None
         self.previousScene: Optional[Scene] = None
 
+        #Scene in preview while studio mode is enabled, current scene being the one in program
+        self.previewScene: Optional[Scene] = None
+        self.studioMode: Optional[bool] = None
+
         self.requests: list = []
         self.pendingResponses: dict = {}
+        self.callbacks: dict = {}
+        #Settle function and expected value of each unanswered request applied optimistically
+        self.expectations: dict = {}
+
+        self.suppressed: int = 0
+
+        #Incremented whenever scenes or sources are added or removed, and whenever filters are added, removed or reloaded
+        self.structure: int = 0
+        self.filterStructure: int = 0
+
+        #Every item reachable from the current scene by name, rebuilt when the current scene changes or the scene list
+        #is patched, and updated in place when single items are added or removed
+        self.items: dict[str, Source] = {} #type: ignore
+        self.itemsStructure: int = -1
+        self.itemsScene: Optional[Scene] = None
+
+        #Order in which the reachable scenes were visited, by name
+        self.itemsOrder: dict[str, int] = {} #type: ignore
+
+        #Volume and mute state of the audio sources that were controlled or reported, by name
+        self.audio: dict[str, Audio] = {} #type: ignore
+
+        #Playback state of the media sources that were controlled or reported, by name
+        self.media: dict[str, Media] = {} #type: ignore
+
+        self.streaming: Output = Output("streaming")
+        self.recording: Output = Output("recording")
+        self.replayBuffer: Output = Output("replay buffer")
+        self.streamHistory: StreamHistory = StreamHistory()
+
+        self.transition: Transition = Transition()
+
+    def synchronize(self) -> None:
+        """Requests the scene list, the state of every tracked audio and media source, the transition and the output states,
+        after authenticating, then refetches the filters of the known sources, which may have changed while disconnected."""
+
+        self.requests.append({"type": "GetSceneList"})
+        for name in self.audio:
+            self.requests.append({
+                "type": "GetVolume",
+                "target": name,
+                })
+        for name in self.media:
+            self.requests.append({
+                "type": "GetMediaState",
+                "target": name,
+                })
+        self.requests.append({"type": "GetStudioModeStatus"})
+        self.requests.append({"type": "GetCurrentTransition"})
+        self.requests.append({"type": "GetStreamingStatus"})
+        self.requests.append({"type": "GetRecordingStatus"})
+        self.requests.append({"type": "GetReplayBufferStatus"})
+        #Queries go out at the lowest priority, after everything above, and each reply covers every item of the source
+        for name in dict.fromkeys(source.name for scene in self.scenes for source in scene.walk()):
+            self.requests.append({
+                "type": "GetSourceFilters",
+                "target": name,
+                })
+
+    def getAudio(self, name: str) -> "Audio":
+        """Returns the state of the named audio source, tracking it from now on if it was not."""
+
+        audio = self.audio.get(name)
+        if audio == None:
+            audio = Audio(name)
+            self.audio[audio.name] = audio
+        return audio #type: ignore
+
+    def getMedia(self, name: str) -> "Media":
+        """Returns the state of the named media source, tracking it from now on if it was not."""
+
+        media = self.media.get(name)
+        if media == None:
+            media = Media(name)
+            self.media[media.name] = media
+        return media #type: ignore
 
     def addScene(self, data: dict) -> None:
         """Adds a scene to the container."""
 
         scene = Scene(data)
 
-        for source in scene.sources:
+        for name in self.shareFilters(scene.walk()):
             self.requests.append({
                 "type": "GetSourceFilters",
-                "target": source.name,
+                "target": name,
                 })
 
         self.scenes.append(scene)
+        self.index[scene.name] = scene
+        self.structure += 1
+
+    def updateScenes(self, scenes: list[dict], current: str) -> None: #type: ignore
+        """Patches the container to match a scene list, keeping the state of unchanged sources."""
+
+        order: dict[str, int] = {} #type: ignore
+        for data in scenes:
+            order[data["name"]] = len(order)
+            scene = self.getScene(data["name"])
+            if scene == None:
+                self.addScene(data)
+            else:
+                for name in self.shareFilters(scene.update(data)): #type: ignore
+                    self.requests.append({
+                        "type": "GetSourceFilters",
+                        "target": name,
+                        })
+
+        self.structure += 1
+        self.scenes = [scene for scene in self.scenes if scene.name in order]
+        present: set[str] = {source.name for scene in self.scenes for source in scene.walk()} #type: ignore
+        self.sources = {name: owner for name, owner in self.sources.items() if name in present}
+        self.scenes.sort(key = lambda scene: order[scene.name])
+        self.index = {scene.name: scene for scene in self.scenes}
+        if self.currentScene == None or self.currentScene.name != current:
+            self.setCurrentScene(current)
+
+    def snapshot(self) -> dict:
+        """Returns a compact representation of the scenes, sources and filters."""
+
+        return {
+            "version": SNAPSHOT_VERSION,
+            "current-scene": self.currentScene.name if self.currentScene != None else None, #type: ignore
+            "scenes": [scene.snapshot() for scene in self.scenes],
+            }
+
+    def restore(self, data: dict) -> bool:
+        """Loads scenes from a snapshot, returning if it was compatible."""
+
+        if data.get("version") != SNAPSHOT_VERSION:
+            return False
+
+        self.scenes = [Scene(sceneData) for sceneData in data["scenes"]]
+        self.index = {scene.name: scene for scene in self.scenes}
+        #The filters of the first item of each source in the snapshot win
+        self.sources = {}
+        for scene in self.scenes:
+            self.shareFilters(scene.walk())
+
+        self.structure += 1
+        self.currentScene = None
+        self.previousScene = None
+        self.previewScene = None
+        if data["current-scene"] != None:
+            self.setCurrentScene(data["current-scene"])
+        return True
 
     def removeScene(self, name: str) -> None:
         """Remove a scene from the container."""
@@ -37,6 +215,8 @@ class OBS:
         for scene in self.scenes:
             if scene.name == name:
                 self.scenes.remove(scene)
+                del self.index[name]
+                self.structure += 1
                 return
 
     def purgeScenes(self) -> None:
@@ -46,74 +226,387 @@ class OBS:
         print("\n\nPurging scenes!\n\n")
 
         self.scenes = []
+        self.index = {}
+        self.sources = {}
+        self.structure += 1
         self.requests.append({"type": "GetSceneList"})
 
     def getScene(self, name: str) -> Optional["Scene"]:
         """Returns reference to scene called name, if it exists."""
 
+        return self.index.get(name)
+
+    def getSource(self, name: str) -> Optional["Source"]:
+        """Returns reference to source in active, if it exists, including items of its groups and nested scenes."""
+
+        if self.itemsStructure != self.structure or self.itemsScene is not self.currentScene:
+            self.reindex()
+        return self.items.get(name)
+
+    def getSources(self, name: str) -> list["Source"]:
+        """Returns every item called name in every scene."""
+
+        return [scene.index[name] for scene in self.scenes if name in scene.index]
+
+    def getFilters(self, name: str) -> Optional["Source"]:
+        """Returns the item holding the filter list of the source called name, shared by all of its items."""
+
+        return self.sources.get(name)
+
+    def shareFilters(self, sources: Iterable["Source"]) -> list[str]: #type: ignore
+        """Makes new items share the filter list of their source, returning the names of the sources that were not known."""
+
+        new: list[str] = [] #type: ignore
+        for source in sources:
+            owner: Optional[Source] = self.sources.get(source.name)
+            if owner == None:
+                self.sources[source.name] = source
+                new.append(source.name)
+            elif owner is not source:
+                source.filters = owner.filters #type: ignore
+        return new
+
+    def reindex(self) -> None:
+        """Flattens the tree of the current scene into the index of getSource.
+
+        Nested scenes are visited breadth first, so an item of the current scene shadows
+        an item of the same name further down."""
+
+        self.items = {}
+        self.itemsStructure = self.structure
+        self.itemsScene = self.currentScene
+        self.itemsOrder = {}
+
+        pending: list[Scene] = [self.currentScene] if self.currentScene != None else [] #type: ignore
+        while pending:
+            scene: Scene = pending.pop(0)
+            if scene.name in self.itemsOrder:
+                continue
+            self.itemsOrder[scene.name] = len(self.itemsOrder)
+            for name, source in scene.index.items():
+                self.items.setdefault(name, source)
+                nested = self.index.get(name)
+                if nested != None:
+                    pending.append(nested) #type: ignore
+
+    def patchItems(self, scene: "Scene", sources: list["Source"], current: bool) -> None:
+        """Updates the index of getSource in place for items added to or removed from scene, if it was current before.
+
+        Items that are nested scenes change what is reachable, so the index is rebuilt on the next lookup instead."""
+
+        if not current or any(source.name in self.index for source in sources):
+            return
+        self.itemsStructure = self.structure
+        if scene.name not in self.itemsOrder:
+            return
+
+        for source in sources:
+            #The item of the first visited scene holding the name wins, as in reindex
+            for name in self.itemsOrder:
+                found: Optional[Source] = self.index[name].getSource(source.name) #type: ignore
+                if found != None:
+                    self.items[source.name] = found #type: ignore
+                    break
+            else:
+                self.items.pop(source.name, None)
+
+    def getContainer(self, name: str) -> tuple[Optional["Scene"], Optional["Source"]]: #type: ignore
+        """Returns the scene called name, or the group called name and the scene holding it."""
+
+        scene = self.index.get(name)
+        if scene != None:
+            return scene, None
         for scene in self.scenes:
-            if scene.name == name:
-                return scene
+            group = scene.getSource(name)
+            if group != None and group.isGroup(): #type: ignore
+                return scene, group
+        return None, None
+
+    def getItem(self, container: str, name: str) -> Optional["Source"]:
+        """Returns the named item of a scene or group, as OBS names them in events."""
+
+        scene, _ = self.getContainer(container)
+        if scene != None:
+            return scene.getSource(name) #type: ignore
         return None
 
-    def getSource(self, name: str) -> Optional["Source"]:
-        """Returns reference to source in active, if it exists."""
+    def addItem(self, container: str, name: str) -> Optional["Source"]:
+        """Adds a new item to a scene or group, returning it if the container is known."""
+
+        scene, group = self.getContainer(container)
+        if scene == None:
+            return None
+        current: bool = self.itemsStructure == self.structure and self.itemsScene is self.currentScene
+        source: Source = scene.addSource({"name": name, "render": True}, group) #type: ignore
+        self.structure += 1
+        self.patchItems(scene, [source], current) #type: ignore
+        for name in self.shareFilters([source]):
+            self.requests.append({
+                "type": "GetSourceFilters",
+                "target": name,
+                })
+        return source
+
+    def removeItem(self, container: str, name: str) -> None:
+        """Removes an item and everything under it from a scene or group."""
 
-        for source in self.currentScene.sources:
+        scene, group = self.getContainer(container)
+        if scene == None:
+            return
+        siblings: list[Source] = group.children if group != None else scene.sources #type: ignore
+        for source in siblings:
             if source.name == name:
-                return source
-        return None
-        #TODO: Search in non-current scene
+                current: bool = self.itemsStructure == self.structure and self.itemsScene is self.currentScene
+                removed: list[Source] = list(source.walk()) #type: ignore
+                scene.removeSource(source) #type: ignore
+                self.structure += 1
+                self.patchItems(scene, removed, current) #type: ignore
+                for item in removed:
+                    if not self.getSources(item.name):
+                        self.sources.pop(item.name, None)
+                return
 
     def setCurrentScene(self, name: str) -> None:
         """Moves currentScene to previousScene and sets the named scene to current."""
 
-        for scene in self.scenes:
-            if scene.name == name:
-                self.previousScene = self.currentScene
-                self.currentScene = scene
-                return
+        scene = self.index.get(name)
+        if scene != None:
+            self.previousScene = self.currentScene
+            self.currentScene = scene
+
+    def setPreviewScene(self, name: Optional[str]) -> None:
+        """Sets the named scene to preview, or clears the preview."""
+
+        self.previewScene = self.index.get(name) if name != None else None #type: ignore
 
 class Scene:
     """Data container for information pertaining to the current state of a scene."""
 
+    __slots__ = ("name", "sources", "index", "shadowed")
+
     def __init__(self, data: dict) -> None:
         """Initializes a scene."""
 
-        self.name: str = data["name"]
+        self.name: str = sys.intern(data["name"])
         self.sources: list[Source] = [] #type: ignore
 
+        #Every item of the scene by name, including the children of groups, and the number of items hidden
+        #from it behind an earlier item of the same name
+        self.index: dict[str, Source] = {} #type: ignore
+        self.shadowed: int = 0
+
         for source in data["sources"]:
             self.addSource(source)
 
-    def addSource(self, data: dict) -> None:
-        """Adds a source to the source list."""
+    def update(self, data: dict) -> list[Source]: #type: ignore
+        """Patches the source tree to match data, returning the sources that are new."""
+
+        existing: dict[str, Source] = self.index #type: ignore
+        added: list[Source] = [] #type: ignore
+
+        self.index = {}
+        self.shadowed = 0
+        self.sources = [self.patch(sourceData, None, existing, added) for sourceData in data["sources"]]
+        return added
+
+    def patch(self, data: dict, parent: Optional["Source"], existing: dict, added: list) -> "Source":
+        """Returns the item for data and its group children, reusing existing items of the same name."""
+
+        source = existing.pop(data["name"], None)
+        if source == None:
+            source = Source(data)
+            added.append(source)
+        else:
+            source.update(data) #type: ignore
 
-        self.sources.append(Source(data))
+        source.scene = self
+        source.parent = parent
+        source.children = [self.patch(child, source, existing, added) for child in data.get("groupChildren", ())] #type: ignore
+        if self.index.setdefault(source.name, source) is not source: #type: ignore
+            self.shadowed += 1
+        return source #type: ignore
+
+    def walk(self) -> Iterator["Source"]:
+        """Yields every item of the scene, parents before their children."""
+
+        for source in self.sources:
+            yield from source.walk()
+
+    def snapshot(self) -> dict:
+        """Returns a compact representation of the scene."""
+
+        return {
+            "name": self.name,
+            "sources": [source.snapshot() for source in self.sources],
+            }
+
+    def addSource(self, data: dict, parent: Optional["Source"] = None) -> "Source":
+        """Adds a source and its group children to the source list, or to the children of parent."""
+
+        source: Source = self.patch(data, parent, {}, [])
+        if parent != None:
+            parent.children.append(source) #type: ignore
+        else:
+            self.sources.append(source)
+        return source
+
+    def removeSource(self, source: "Source") -> None:
+        """Removes a source and its group children from the scene."""
+
+        if source.parent != None:
+            source.parent.children.remove(source) #type: ignore
+        else:
+            self.sources.remove(source)
+
+        removed: bool = False
+        for item in source.walk():
+            if self.index.get(item.name) is item:
+                del self.index[item.name]
+                removed = True
+            else:
+                self.shadowed -= 1
+
+        #Another item of the same name may remain elsewhere in the tree, which only happens if some were shadowed
+        if removed and self.shadowed > 0:
+            self.shadowed = 0
+            for item in self.walk():
+                if self.index.setdefault(item.name, item) is not item:
+                    self.shadowed += 1
 
     def getSource(self, name: str) -> Optional["Source"]:
         """Returns reference to source called name, if it exists."""
 
-        for source in self.sources:
-            if source.name == name:
-                return source
-        return None
+        return self.index.get(name)
+
+class Reconciled:
+    """Visibility of a source or filter applied optimistically and reconciled with the answers of OBS.
+
+    Subclasses provide isVisible and setVisible, and slots for confirmed and inflight."""
+
+    __slots__ = ()
+
+    def track(self, visible: bool) -> None:
+        """Starts from visibility as reported by OBS, with no unanswered requests."""
+
+        #Visibility last confirmed by OBS, and the number of unanswered requests changing it
+        self.confirmed: bool = visible
+        self.inflight: int = 0
+
+    def setVisible(self, visible: bool) -> None:
+        """Sets visibility."""
+
+        raise NotImplementedError
+
+    def expectVisible(self, visible: bool) -> None:
+        """Sets visibility ahead of the confirmation of a request."""
 
-class Source:
-    """Data container for information pertaining to the current state of a source."""
+        self.inflight += 1
+        self.setVisible(visible)
+
+    def settleVisible(self, visible: bool, ok: bool) -> None:
+        """Settles a request for visibility, rolling back to the confirmed state if it failed."""
+
+        self.inflight = max(self.inflight - 1, 0)
+        if ok:
+            self.confirmed = visible
+        if self.inflight == 0:
+            self.setVisible(self.confirmed)
+
+    def confirmVisible(self, visible: bool) -> None:
+        """Records visibility reported by OBS, applying it unless requests are unanswered."""
+
+        self.confirmed = visible
+        if self.inflight == 0:
+            self.setVisible(visible)
+
+class Source(Reconciled):
+    """Data container for information pertaining to the current state of a source.
+
+    Only the fields used by the tool are kept from the scene item data sent by OBS."""
+
+    __slots__ = ("name", "type", "render", "filters", "confirmed", "inflight", "scene", "parent", "children", "transform")
 
     def __init__(self, data: dict) -> None:
-        """Initializes a source."""
+        """Initializes a source, with the filters of a snapshot if present."""
+
+        self.name: str = sys.intern(data["name"])
+        self.type: Optional[str] = intern(data.get("type"))
+        self.render: bool = data["render"]
+        self.filters: list[Filter] = [Filter(_filter) for _filter in data.get("filters", ())] #type: ignore
+
+        #Place in the tree, where scene is the scene holding the item even inside a group
+        self.scene: Optional[Scene] = None
+        self.parent: Optional[Source] = None
+        self.children: list[Source] = [] #type: ignore
+
+        #Position, scale, rotation and crop, only known once the item was moved or its properties asked for
+        self.transform: Optional[Transform] = None
 
-        self.name: str = data["name"]
-        self.data: dict = data
-        self.filters: list[Filter] = [] #type: ignore
+        self.track(self.render)
+
+    def update(self, data: dict) -> None:
+        """Patches the item data, keeping the optimistic visibility while requests are unanswered."""
+
+        self.type = intern(data.get("type"))
+        self.confirmed = data["render"]
+        if self.inflight == 0:
+            self.render = self.confirmed
+
+    def walk(self) -> Iterator["Source"]:
+        """Yields the source and every item under it."""
+
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def getTransform(self) -> "Transform":
+        """Returns the transform of the item, starting from the defaults if it is not known."""
+
+        if self.transform == None:
+            self.transform = Transform()
+        return self.transform #type: ignore
+
+    def expectTransform(self) -> None:
+        """Counts a request changing the transform, whose properties were already applied."""
+
+        self.getTransform().inflight += 1
+
+    def settleTransform(self, _: None, ok: bool) -> None:
+        """Settles a request changing the transform, forgetting the transform if it failed so it is asked again."""
+
+        if self.transform != None:
+            self.transform.inflight = max(self.transform.inflight - 1, 0) #type: ignore
+            if not ok:
+                self.transform = None
+
+    def confirmTransform(self, data: dict) -> None:
+        """Records a transform reported by OBS, unless requests changing it are unanswered,
+        since those would be echoes older than the properties applied since."""
+
+        transform: Transform = self.getTransform()
+        if transform.inflight == 0:
+            transform.update(data)
+
+    def isGroup(self) -> bool:
+        """Returns if the source is a group of other items."""
+
+        return self.type == "group" or len(self.children) > 0
 
     def addFilter(self, data: dict) -> None:
         """Adds a filter to the source."""
 
         self.filters.append(Filter(data))
 
+    def removeFilter(self, name: str) -> None:
+        """Removes the named filter from the source if present, in the list shared by the items of the source."""
+
+        self.filters[:] = [_filter for _filter in self.filters if _filter.name != name]
+
+    def setFilters(self, filters: list[dict]) -> None: #type: ignore
+        """Replaces the filters of the source, in the list shared by the items of the source."""
+
+        self.filters[:] = [Filter(data) for data in filters]
+
     def getFilter(self, name: str) -> Optional["Filter"]:
         """Returns the named filter if present in the source."""
 
@@ -125,24 +618,73 @@ class Source:
     def isVisible(self) -> bool:
         """Returns if the source is visible."""
 
-        return self.data["render"]
+        return self.render
 
     def setVisible(self, visible: bool) -> None:
         """Sets source visibility."""
 
-        self.data["render"] = visible
+        self.render = visible
+
+    def snapshot(self) -> dict:
+        """Returns a compact representation of the source and its filters."""
+
+        data: dict = {
+            "name": self.name,
+            "type": self.type,
+            "render": self.render,
+            "filters": [_filter.snapshot() for _filter in self.filters],
+            }
+        if self.children:
+            data["groupChildren"] = [child.snapshot() for child in self.children]
+        return data
+
+class Transform:
+    """Data container for the position, scale, rotation and crop of a scene item."""
 
-class Filter:
+    __slots__ = tuple(TRANSFORM) + ("inflight",)
+
+    def __init__(self) -> None:
+        """Initializes a transform to the defaults."""
+
+        for name, (_, _, default) in TRANSFORM.items():
+            setattr(self, name, default)
+
+        #Number of unanswered requests changing the transform
+        self.inflight: int = 0
+
+    def update(self, data: dict) -> None:
+        """Copies the properties present in a transform from OBS, nested as in SceneItemTransform."""
+
+        for name, (group, field, _) in TRANSFORM.items():
+            values: Optional[dict] = data.get(group) if group != None else data #type: ignore
+            if values != None and field in values:
+                setattr(self, name, values[field])
+
+    def get(self, name: str) -> float:
+        """Returns the named property."""
+
+        return getattr(self, name)
+
+    def set(self, name: str, value: float) -> None:
+        """Sets the named property."""
+
+        setattr(self, name, value)
+
+class Filter(Reconciled):
     """Data container for information pertaining to the current state of a filter."""
 
+    __slots__ = ("name", "settings", "type", "enabled", "confirmed", "inflight")
+
     def __init__(self, data: dict) -> None:
-        """Initializes a filter."""
+        """Initializes a filter, taking ownership of its settings."""
 
-        self.name: str = data["name"]
+        self.name: str = sys.intern(data["name"])
         self.settings: dict = data["settings"]
-        self.type: str = data["type"]
+        self.type: str = sys.intern(data["type"])
         self.enabled: bool = data["enabled"]
 
+        self.track(self.enabled)
+
     def isVisible(self) -> bool:
         """Returns if the filter is visible."""
 
@@ -153,6 +695,180 @@ class Filter:
 
         self.enabled = visible
 
-        
+    def snapshot(self) -> dict:
+        """Returns a compact representation of the filter."""
+
+        return {
+            "name": self.name,
+            "type": self.type,
+            "enabled": self.enabled,
+            "settings": self.settings,
+            }
+
+class Audio:
+    """Data container for the volume and mute state of an audio source."""
+
+    __slots__ = ("name", "volume", "muted")
+
+    def __init__(self, name: str) -> None:
+        """Initializes an audio source whose state is not known yet."""
+
+        self.name: str = sys.intern(name)
+        self.volume: Optional[float] = None
+        self.muted: Optional[bool] = None
+
+class Media:
+    """Data container for the playback state of a media source."""
+
+    __slots__ = ("name", "state")
+
+    def __init__(self, name: str) -> None:
+        """Initializes a media source whose state is not known yet."""
+
+        self.name: str = sys.intern(name)
+        self.state: Optional[str] = None
+
+    def isPlaying(self) -> bool:
+        """Returns if the media is playing or about to."""
+
+        return self.state in ("playing", "opening", "buffering")
+
+class Output:
+    """Data container for the state of the stream, recording or replay buffer output."""
+
+    __slots__ = ("name", "state", "paused", "confirmed", "inflight")
+
+    def __init__(self, name: str) -> None:
+        """Initializes an output whose state is not known yet."""
+
+        self.name: str = name
+        self.state: Optional[str] = None
+        self.paused: bool = False
+
+        #State before the unanswered requests changing it, and their number
+        self.confirmed: Optional[str] = None
+        self.inflight: int = 0
+
+    def isActive(self) -> bool:
+        """Returns if the output is running or about to."""
+
+        return self.state == "starting" or self.state == "started"
+
+    def setActive(self, active: bool) -> None:
+        """Sets the state reported by a status, unless the output is between states because of an unanswered request."""
+
+        if self.inflight == 0 or (self.state != "starting" and self.state != "stopping"):
+            self.state = "started" if active else "stopped"
+        if not active:
+            self.paused = False
+
+    def expectState(self, state: str) -> None:
+        """Sets the state ahead of the answer to a request starting or stopping the output."""
+
+        if self.inflight == 0:
+            self.confirmed = self.state
+        self.inflight += 1
+        self.state = state
+
+    def settleState(self, state: str, ok: bool) -> None:
+        """Settles a request starting or stopping the output, rolling back to the earlier state if it failed."""
+
+        self.inflight = max(self.inflight - 1, 0)
+        if not ok and self.inflight == 0 and self.state == state:
+            self.state = self.confirmed
+
+    def settlePaused(self, paused: bool, ok: bool) -> None:
+        """Settles a request pausing or resuming the output, rolling back if it failed."""
+
+        if not ok and self.paused == paused:
+            self.paused = not paused
+
+class StreamHistory:
+    """Fixed-size ring buffer of the latest StreamStatus samples, one preallocated column per field."""
+
+    __slots__ = ("size", "index", "count", "times", "columns")
+
+    def __init__(self, size: int = 64) -> None:
+        """Initializes an empty history of up to size samples."""
+
+        self.size: int = size
+        self.index: int = 0
+        self.count: int = 0
+        self.times: array.array = array.array("d", bytes(8 * size))
+        self.columns: dict[str, array.array] = {field: array.array("d", bytes(8 * size)) for field in STREAM_FIELDS} #type: ignore
+
+    def __len__(self) -> int:
+        """Returns the number of samples held."""
+
+        return self.count
+
+    def record(self, now: float, data: dict) -> None:
+        """Stores the fields of a StreamStatus event received at now, overwriting the oldest sample when full."""
+
+        self.times[self.index] = now
+        for field, column in self.columns.items():
+            column[self.index] = data.get(field, 0)
+        self.index = (self.index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def latest(self, field: str, age: int = 0) -> float:
+        """Returns a field of the latest sample, or of the one age samples before it, or zero without samples."""
+
+        if age >= self.count:
+            return 0.0
+        return self.columns[field][(self.index - 1 - age) % self.size]
+
+    def mean(self, field: str, samples: int = 0) -> float:
+        """Returns the mean of a field over the latest samples, or over all of them if samples is zero."""
+
+        samples = self.count if samples <= 0 else min(samples, self.count)
+        if samples == 0:
+            return 0.0
+        column: array.array = self.columns[field]
+        return sum(column[(self.index - 1 - age) % self.size] for age in range(samples)) / samples
+
+    def droppedRatio(self, samples: int = 0) -> float:
+        """Returns the share of frames dropped over the latest samples, or over all of them if samples is zero."""
+
+        samples = self.count if samples <= 0 else min(samples, self.count)
+        if samples < 2:
+            return 0.0
+        frames: float = self.latest("num-total-frames") - self.latest("num-total-frames", samples - 1)
+        if frames <= 0:
+            return 0.0
+        return (self.latest("num-dropped-frames") - self.latest("num-dropped-frames", samples - 1)) / frames
+
+class Transition:
+    """Data container for the current transition and whether a scene switch is running through it."""
+
+    __slots__ = ("name", "duration", "active", "target", "until", "restore")
+
+    def __init__(self) -> None:
+        """Initializes an idle transition whose settings are not known yet."""
+
+        self.name: Optional[str] = None
+        self.duration: int = 300
+        self.active: bool = False
+        self.target: Optional[str] = None
+        self.until: float = 0.0
+
+        #Name and duration to set back once a transition with an override ends
+        self.restore: Optional[tuple[Optional[str], int]] = None #type: ignore
+
+    def begin(self, target: str, now: float, duration: Optional[int] = None) -> None:
+        """Marks a switch to target as running from now, for duration milliseconds or the current duration."""
+
+        self.active = True
+        self.target = target
+        self.until = now + (self.duration if duration == None else duration) / 1000 + TRANSITION_MARGIN #type: ignore
+
+    def end(self) -> None:
+        """Marks the running switch as finished."""
+
+        self.active = False
+        self.target = None
+
+    def isRunning(self, now: float) -> bool:
+        """Returns if a switch is running at now."""
 
-        
+        return self.active and now < self.until
@@ -0,0 +1,82 @@
+from __future__ import annotations #for python3.8 or less
+
+import re, fnmatch
+
+from typing import Optional
+
+from structures import OBS, Scene, Source, Filter
+
+def compilePattern(pattern: str, regex: bool) -> re.Pattern:
+    """Compiles a glob pattern, or a regular expression if regex is set."""
+
+    if regex:
+        return re.compile(pattern)
+    return re.compile(fnmatch.translate(pattern))
+
+class Selector:
+    """Multi-target selection of sources or filters, compiled when the config is loaded.
+
+    Resolved targets are cached until the scene/source structure of OBS changes, or its filters for filter selectors."""
+
+    def __init__(self, command: dict) -> None:
+        """Initializes the selector from the match, filter, regex and scenes options of a command."""
+
+        regex: bool = command.get("regex", False)
+        self.sourcePattern: re.Pattern = compilePattern(command.get("match", "*"), regex)
+        self.filterPattern: Optional[re.Pattern] = None
+        if "filter" in command:
+            self.filterPattern = compilePattern(command["filter"], regex)
+
+        self.allScenes: bool = command.get("scenes", "current") == "all"
+        if command.get("scenes", "current") not in ("current", "all"):
+            raise RuntimeError(f"Unknown scene scope {command['scenes']}.")
+
+        self.structure: int = -1
+        self.filterStructure: int = -1
+        self.scene: Optional[Scene] = None
+        self.sourceTargets: list[tuple[Scene, Source]] = [] #type: ignore
+        self.filterTargets: list[tuple[Source, Filter]] = [] #type: ignore
+
+    def __repr__(self) -> str:
+        """Returns the patterns of the selector."""
+
+        return f"Selector({self.sourcePattern.pattern!r}, {self.filterPattern.pattern if self.filterPattern else None!r})"
+
+    def refresh(self, obs: OBS) -> None:
+        """Resolves the targets again if the structure or current scene changed since the last resolution."""
+
+        if self.structure == obs.structure and (self.allScenes or self.scene is obs.currentScene) \
+           and (self.filterPattern == None or self.filterStructure == obs.filterStructure):
+            return
+
+        self.structure = obs.structure
+        self.filterStructure = obs.filterStructure
+        self.scene = obs.currentScene
+        self.sourceTargets = []
+        self.filterTargets = []
+
+        scenes: list[Scene] = obs.scenes if self.allScenes else ([obs.currentScene] if obs.currentScene != None else []) #type: ignore
+        seen: set[str] = set() #type: ignore
+        for scene in scenes:
+            for source in scene.walk():
+                if not self.sourcePattern.match(source.name):
+                    continue
+                self.sourceTargets.append((scene, source))
+
+                if self.filterPattern != None and source.name not in seen:
+                    seen.add(source.name)
+                    for _filter in source.filters:
+                        if self.filterPattern.match(_filter.name): #type: ignore
+                            self.filterTargets.append((source, _filter))
+
+    def sources(self, obs: OBS) -> list[tuple[Scene, Source]]: #type: ignore
+        """Returns the scene items matched by the selector."""
+
+        self.refresh(obs)
+        return self.sourceTargets
+
+    def filters(self, obs: OBS) -> list[tuple[Source, Filter]]: #type: ignore
+        """Returns the filters matched by the selector, once per source name."""
+
+        self.refresh(obs)
+        return self.filterTargets
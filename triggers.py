@@ -0,0 +1,112 @@
+from __future__ import annotations #for python3.8 or less
+
+import bisect
+
+from collections import defaultdict as ddict
+
+#Largest data value of each trigger, 7-bit triggers are compiled into dispatch arrays and 14-bit ones into range indexes
+MAXIMUMS: dict[str, int] = {
+    "note_on": 127,
+    "note_off": 127,
+    "control_change": 127,
+    "control_change_14": 16383,
+    "nrpn": 16383,
+    "rpn": 16383,
+    "pitchwheel": 16383,
+    }
+
+def bounds(command: dict, maximum: int) -> tuple[int, int]: #type: ignore
+    """Returns the inclusive range of data values a command fires for, from its between, above and below conditions.
+
+    The range key is not used, since animateFilter already maps the data onto it."""
+
+    low: int = 0
+    high: int = maximum
+    if "between" in command:
+        low, high = command["between"]
+    if "above" in command:
+        low = max(low, command["above"] + 1)
+    if "below" in command:
+        high = min(high, command["below"] - 1)
+
+    if low > high or low > maximum or high < 0:
+        raise RuntimeError(f"Condition of {command['type']} on {command['trigger']} {command['value']} never matches.")
+    return max(low, 0), min(high, maximum)
+
+def segments(commands: list[dict], maximum: int) -> tuple[list[int], list[tuple]]: #type: ignore
+    """Splits the data range into segments where the same commands fire, in config order.
+
+    Returns the first value of each segment and the commands of each segment."""
+
+    ranges: list[tuple[int, int]] = [bounds(command, maximum) for command in commands] #type: ignore
+    starts: list[int] = sorted({0} | {low for low, _ in ranges} | {high + 1 for _, high in ranges if high < maximum})
+
+    matches: list[tuple] = []
+    for start in starts:
+        matches.append(tuple(command for command, (low, high) in zip(commands, ranges) if low <= start <= high))
+    return starts, matches
+
+class ValueTable(tuple):
+    """Dispatch array of the commands firing for each 7-bit data value, indexed like a tuple."""
+
+    def __new__(cls, commands: list[dict]) -> "ValueTable":
+        """Compiles the commands of a single trigger number into 128 entries, shared between equal values."""
+
+        starts, matches = segments(commands, 127)
+        entries: list[tuple] = []
+        for i, start in enumerate(starts):
+            end: int = starts[i + 1] if i + 1 < len(starts) else 128
+            entries.extend([matches[i]] * (end - start))
+        return super().__new__(cls, entries)
+
+    def __repr__(self) -> str:
+        """Returns the commands with the data values they fire for."""
+
+        starts: list[int] = [value for value in range(128) if value == 0 or self[value] is not self[value - 1]]
+        return repr(describe(starts, [self[start] for start in starts], 127))
+
+class RangeIndex:
+    """Sorted range index of the commands firing for each 14-bit data value, looked up by bisection."""
+
+    __slots__ = ("starts", "matches")
+
+    def __init__(self, commands: list[dict]) -> None:
+        """Compiles the commands of a single trigger number into segments of the data range."""
+
+        self.starts: list[int]
+        self.matches: list[tuple]
+        self.starts, self.matches = segments(commands, 16383)
+
+    def __getitem__(self, data: int) -> tuple:
+        """Returns the commands firing for the data value."""
+
+        return self.matches[bisect.bisect_right(self.starts, data) - 1]
+
+    def __repr__(self) -> str:
+        """Returns the commands with the data values they fire for."""
+
+        return repr(describe(self.starts, self.matches, 16383))
+
+def describe(starts: list[int], matches: list[tuple], maximum: int) -> list[tuple[int, int, list]]: #type: ignore
+    """Returns the segments with commands as inclusive ranges with the types of their commands."""
+
+    result: list = []
+    for i, start in enumerate(starts):
+        if matches[i]:
+            end: int = starts[i + 1] - 1 if i + 1 < len(starts) else maximum
+            result.append((start, end, [command["type"] for command in matches[i]]))
+    return result
+
+def compileTriggers(config: dict[str, dict[int, list[dict]]]) -> dict[str, ddict]: #type: ignore
+    """Compiles the commands of each trigger and number into tables indexed by the data value.
+
+    Looking up a number without commands returns a shared empty table."""
+
+    compiled: dict[str, ddict] = {} #type: ignore
+    for trigger, numbers in config.items():
+        table = ValueTable if MAXIMUMS[trigger] == 127 else RangeIndex
+        empty = table([])
+        compiled[trigger] = ddict(lambda empty = empty: empty)
+        for number, commands in numbers.items():
+            compiled[trigger][number] = table(commands)
+    return compiled